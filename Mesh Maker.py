@@ -8,19 +8,31 @@
 '''
 
 import adsk.core, adsk.fusion, traceback
-import math
+import itertools
 import os
+import sys
+import tempfile
+
+# The headless helpers live next to this file
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from meshCore import hingeType, planIter, layoutTable
+from meshIO import fromBRep
+from preflight import preflightCheck
+from partCache import partCache, partSignature, templateKey
+import partGen
+from exportJournal import exportJournal
+from progress import progressReporter
+from stageTimer import stageTimer
+import pipeline
+from fileWriter import backgroundWriter
+from placement import transformTable, writeAssembly, assemblyPath, partFrame
+from edgeNumbering import edgeNumbering
+from faceOrder import faceOrder, orderings
+from faceManifest import faceManifest, faceSignature
+from partArchive import partArchive
 
 handlers = []
 
-""" Represents the different types of hinges. An openEdge hinge is used on
-    an edge in an open surface with no adjacent triangle on the given side.
-    IE, a side with no hinge at all. """
-class hingeType:
-    male = "male"
-    female = "female"
-    openEdge = "openEdge"
-
 """ The browser names of the various important comonents in the template triangle.
     For example, "fStr1" represents the female hinge component on side one of the triangle.
     Change these values if you modify the browser names. """
@@ -38,6 +50,10 @@ coreStr = "center"
 templateStr = "Mesh Maker Template"
 fStr1l, fStr1r, fStr2l, fStr2r, fStr3l, fStr3r = "1l", "1r", "2l", "2r", "3l", "3r"
 
+""" Side length (mm) the template is set to while its bodies are measured for
+    the template key. """
+referenceSide = 250.0
+
 """design = app.activeProduct
 rootComp = design.rootComponent;"""
 app = adsk.core.Application.get()
@@ -68,9 +84,20 @@ def run(context):
                 inputs.addStringValueInput('dir', 'Export directory', "C:/example/<mesh_name>")
 
                 inputs.addBoolValueInput('validate', 'Color bad triangles', True)
+                inputs.addBoolValueInput('preflight', 'Pre-flight check only', True)
                 inputs.addBoolValueInput('debug', 'Debugging Mode', True)
                 inputs.addBoolValueInput('report', 'Report sides', True)
                 inputs.addBoolValueInput('preview', 'Preview assembly', True)
+                inputs.addBoolValueInput('synthesize', 'Generate parts without CAD (no preview)', True)
+                inputs.addBoolValueInput('timing', 'Record stage timings', True)
+                inputs.addBoolValueInput('compress', 'Compress parts (.stl.gz)', True)
+                inputs.addBoolValueInput('bundle', 'Bundle parts into one .zip', True)
+                inputs.addBoolValueInput('renumber', 'Renumber edges for fewer bit bodies', True)
+                inputs.addBoolValueInput('scratch', 'Combine parts in a scratch direct design', True)
+                inputs.addBoolValueInput('reuse', 'Reuse parts from earlier runs', True, '', True)
+                orderInput = inputs.addDropDownCommandInput('order', 'Face order', adsk.core.DropDownStyles.TextListDropDownStyle)
+                for name in orderings:
+                    orderInput.listItems.add(name, name == "mesh")
 
                 initialVal = adsk.core.ValueInput.createByReal(0)
                 inputs.addValueInput('testNum', 'Number of Triangles to Test', 'cm', initialVal)
@@ -105,12 +132,30 @@ def run(context):
                             mesh = input.selection(0).entity
                         if input.id == 'validate':
                             validate = input.value
+                        if input.id == 'preflight':
+                            preflight = input.value
                         if input.id == 'debug':
                             debug = input.value
                         if input.id == 'report':
                             report = input.value
                         if input.id == 'preview':
                             preview = input.value
+                        if input.id == 'synthesize':
+                            synthesize = input.value
+                        if input.id == 'timing':
+                            timing = input.value
+                        if input.id == 'compress':
+                            compress = input.value
+                        if input.id == 'bundle':
+                            bundle = input.value
+                        if input.id == 'renumber':
+                            renumber = input.value
+                        if input.id == 'scratch':
+                            useScratch = input.value
+                        if input.id == 'reuse':
+                            reuse = input.value
+                        if input.id == 'order':
+                            ordering = input.selectedItem.name
                         if input.id == 'dir':
                             saveDir = input.value
                             print(saveDir)
@@ -122,7 +167,7 @@ def run(context):
                                 tmp.append(input.selection(i).entity)
                             coreDict[input.id] = tmp
 
-                    makeMesh(mesh, validate, debug, report, preview, saveDir, testNum, coreDict)
+                    makeMesh(mesh, validate, preflight, debug, report, preview, synthesize, timing, compress, bundle, renumber, ordering, useScratch, reuse, saveDir, testNum, coreDict)
                     # Do something with the results.
                 except:
                     if ui:
@@ -164,7 +209,7 @@ def stop(context):
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 """ Execute the add-in given the supplied inputs. """
-def makeMesh(mesh, validateColor, debug, report, preview, saveDir, testNum, coreDict):
+def makeMesh(mesh, validateColor, preflight, debug, report, preview, synthesize, timing, compress, bundle, renumber, ordering, useScratch, reuse, saveDir, testNum, coreDict):
     # Find the design files and root components
     global app
     global ui
@@ -193,608 +238,638 @@ def makeMesh(mesh, validateColor, debug, report, preview, saveDir, testNum, core
         return
     templateComp = templateDesign.rootComponent
     
-    # Find hinge, frame and center bodies
-    occs = templateComp.occurrences
-    bodies = templateComp.bRepBodies
-    # Find the Hinge components and center body
-    f1 = occs.itemByName(fStr1)
-    f2 = occs.itemByName(fStr2)
-    f3 = occs.itemByName(fStr3)
-
-    m1 = occs.itemByName(mStr1)
-    m2 = occs.itemByName(mStr2)
-    m3 = occs.itemByName(mStr3)
-
-    b1 = occs.itemByName(bStr1)
-    b2 = occs.itemByName(bStr2)
-    b3 = occs.itemByName(bStr3)
-
-    center = templateComp.bRepBodies.itemByName("frame")
-
-    if not f1:
-        ui.messageBox("Side 1 female hinge (Component '" + fStr1 + "') not found")
-        return
-    if not f2:
-        ui.messageBox("Side 2 female hinge (Component '" + fStr2 + "') not found")
-        return
-    if not f3:
-        ui.messageBox("Side 3 female hinge (Component '" + fStr3 + "') not found")
-        return
-    if not m1:
-        ui.messageBox("Side 1 male hinge (Component '" + mStr1 + "') not found")
-        return
-    if not m2:
-        ui.messageBox("Side 2 male hinge (Component '" + mStr2 + "') not found")
-        return
-    if not m3:
-        ui.messageBox("Side 3 male hinge (Component '" + mStr3 + "') not found")
-        return
-    if not center:
-        ui.messageBox("Center (Body '" + cs + "' not found")
-        return
-    if not (b1 and b2 and b3):
-        ui.messageBox("Missing binary bit pattern (" + bStr1 +", " + bStr2 + ", " + bStr3 + ")")
-        return
-
-    # Find the hinge bodies
-    f1l = bodies.itemByName(fStr1l)
-    f1r = bodies.itemByName(fStr1r)
-    f2l = bodies.itemByName(fStr2l)
-    f2r = bodies.itemByName(fStr2r)
-    f3l = bodies.itemByName(fStr3l)
-    f3r = bodies.itemByName(fStr3r)
-    if not (f1l and f1r and f2l and f2r and f3l and f3r):
-        ui.messageBox("A female hinge body wasn't found (" + fStr1l +", " + fStr1r + ", " + fStr2l + "...)")
-        return
-
-    # Find the side parameters
-    paramList = templateDesign.userParameters
-    s1 = paramList.itemByName("sideOne")
-    s2 = paramList.itemByName("sideTwo")
-    s3 = paramList.itemByName("sideThree")
-    digits = paramList.itemByName("binaryDigits")
-    if not s1:
-        ui.messageBox("Parameter 'sideOne' not found")
-        return
-    if not s2:
-        ui.messageBox("Parameter 'sideTwo' not found")
-        return
-    if not s3:
-        ui.messageBox("Parameter 'sideThree' not found")
+    # Resolve the template's bodies, proxies, parameters and appearances once
+    context = templateContext(templateDesign)
+    if context.problems:
+        ui.messageBox(context.problems[0])
         return
-    if not digits:
-        ui.messageBox("Parameter 'binaryDigits' not found")
-        return
-    digits = digits.value
+    digits = context.digits
+    paramList = context.params
     uniqueEdges = mesh.edges.count
-    exp = 1
-    while (2**exp < uniqueEdges):
-        exp += 1
-    if exp > digits:
-        ui.messageBox("Not enough binary digits, need at least %r digits to represent %.0f unique edges" %
-        (exp, uniqueEdges))
-        return
-
-    def hingeBodies(side1, sideNum):
-        returnBodies = []
-        if sideNum == 1:
-            fBodyl = f1l
-            fBodyr = f1r
-            fOcc = f1
-            mOcc = m1
-        elif sideNum == 2:
-            fBodyl = f2l
-            fBodyr = f2r
-            fOcc = f2
-            mOcc = m2
-        else:
-            fBodyl = f3l
-            fBodyr = f3r
-            fOcc = f3
-            mOcc = m3
-
-        mComp = mOcc.component
-        fComp = fOcc.component
-
-        if side1.hinge == hingeType.male:
-            for body in mComp.bRepBodies:
-                proxy = proxyBody(mComp.bRepBodies, mOcc, body.name)
-                returnBodies.append(proxy)
-        elif side1.hinge == hingeType.female:
-            for body in fComp.bRepBodies:
-                proxy = proxyBody(fComp.bRepBodies, fOcc, body.name)
-                returnBodies.append(proxy)
-            returnBodies.append(fBodyl)
-            returnBodies.append(fBodyr)
-        core = bodies.itemByName(coreStr)
-        if core:
-            returnBodies.append(core)
-        return returnBodies
+    meshName = mesh.parentComponent.name
+
+    timer = stageTimer(timing)
+
+    # The side parameters change with every face, everything else shapes every
+    # part. Sketch and feature edits only show in the bodies
+    with timer.stage("templateKey"):
+        templateHash = templateKey(((p.name, p.expression) for p in paramList
+            if p.name not in ("sideOne", "sideTwo", "sideThree")), context.geometry())
+    if compress:
+        templateHash += ":compressed"
+
+    # Synthesized parts are built from the template's values instead of its bodies
+    if synthesize:
+        preview = False
+        values = {}
+        for p in paramList:
+            # Lengths come back in cm, unitless values as is
+            values[p.name] = p.value * 10 if p.unit else p.value
+        synthParams = partGen.partParams.fromTemplate(values)
+        # Keep synthesized and combined parts apart in the part cache
+        templateHash += ":synthesized"
+    cache = partCache(saveDir)
 
     def coreBodies(face):
         for core in coreDict:
             if face in coreDict[core]:
-                return bodies.itemByName(core)
+                return context.body(core)
         return None
 
-    def update(side1, side2, side3):
-            try:
-                if isinstance(side1, float):
-                    s1.expression = "%.3f mm" % side1
-                    s2.expression = "%.3f mm" % side2
-                    s3.expression = "%.3f mm" % side3
-                else:
-                    #s1.expression = "%.3f mm" % ((side1.length + s1.value*10)/2.0)
-                    #s2.expression = "%.3f mm" % ((side2.length + s2.value*10)/2.0)
-                    #s3.expression = "%.3f mm" % ((side3.length + s3.value*10)/2.0)
-                    s1.expression = "%.3f mm" % side1.length
-                    s2.expression = "%.3f mm" % side2.length
-                    s3.expression = "%.3f mm" % side3.length
-            except:
-                # Triangle Failed
-                yn = ui.messageBox("Triangle Failed!\n s1: %d, %.3f, %r\ns2: %d, %.3f, %r\ns3: %d, %.3f, %r" % (
-                side1.index, side1.length, side1.hinge, side2.index, side2.length, side2.hinge,
-                side3.index, side3.length, side3.hinge), "Triangle Error", 1)
-                if yn != 0:
-                    return True
-
-
-
-
-    """ Process a single triangle with the specified behavior (debug, report sides). """
-    def process():
-
-        # Assign the largest length to s1, improves reliability and solves a vertical s2/s3 glitch
-        if (sideTup[1].length > sideTup[0].length and sideTup[1].length > sideTup[2].length):
-            side1, side2, side3 = sideTup[1], sideTup[2], sideTup[0]
-        elif (sideTup[2].length > sideTup[0].length and sideTup[2].length > sideTup[1].length):
-            side1, side2, side3 = sideTup[2], sideTup[0], sideTup[1]
-        else:
-            side1, side2, side3 = sideTup[0], sideTup[1], sideTup[2]
+    """ Queue the combined body of a part for the main assembly. The body is
+        copied and moved in memory, every queued body is added to the mesh
+        component in one go once the run finishes. """
+    def previewPart(part, body):
+        name = os.path.splitext(part.name)[0]
+        if name in previewBodies or name in previewQueue:
+            return
+        tbm = adsk.fusion.TemporaryBRepManager.get()
+        tempBody = tbm.copy(body)
+        transform = adsk.core.Matrix3D.create()
+        inputs = originInputs(context) + frameInputs(frames, part.face)
+        transform.setToAlignCoordinateSystems(*inputs)
+        tbm.transform(tempBody, transform)
+        previewQueue[name] = tempBody
+
+    """ The build stage, run on the main thread as it drives Fusion: set the
+        template's sides, combine the part's bodies and export it to the temp
+        directory, or synthesize it. Return what the writer puts in place,
+        the part's bytes or a pipeline.partFile, or None if there's nothing
+        to write: debug runs, parts kept from an earlier run and failures.
+        The part's sides are sorted longest first, which improves reliability
+        and solves a vertical s2/s3 glitch. """
+    def builder(part):
+        side1, side2, side3 = part.sides
+        name = part.name
+        if report:
+            progress.note(sidesText(side1, side2, side3))
+        if debug:
+            progress.step()
+            return None
+        core = coreBodies(sideIter.topology.faceRefs[part.face])
+        coreName = core.name if core else None
+        # Parts an earlier run made from the same sides and template stay
+        signature = None
+        if faces:
+            signature = faceSignature(side1, side2, side3, digits, templateHash, coreName)
+            if reuse and faces.unchanged(name, signature):
+                placed.append((part.face, os.path.basename(writer.finalPath(name))))
+                progress.step()
+                return None
+        if reuse and journal and journal.isDone(name):
+            if faces:
+                faces.record(part.face, name, signature, os.path.basename(writer.finalPath(name)))
+            placed.append((part.face, os.path.basename(writer.finalPath(name))))
+            progress.step()
+            return None
+        # Identical parts are only made once, the preview needs the real
+        # body though. A hit skips the side update and its recompute too
+        key = partSignature(side1, side2, side3, digits, templateHash, coreName)
+        if reuse and not preview and not bundle:
+            with timer.stage("cache"):
+                cached = cache.lookup(key)
+            if cached:
+                signed[part.face] = (None, signature)
+                progress.step()
+                adsk.doEvents()
+                return pipeline.partFile(cached, copy=True)
+        fault = " (%s)" % part.fault if part.fault else ""
+        if not synthesize:
+            with timer.stage("update"):
+                try:
+                    setSides(context, side1, side2, side3)
+                except:
+                    progress.fail("Triangle failed!%s %s" % (fault, sidesText(side1, side2, side3)))
+                    return None
+        try:
+            if synthesize:
+                with timer.stage("synthesize"):
+                    data = partGen.partBytes(side1, side2, side3, synthParams)
+            else:
+                data = pipeline.partFile(os.path.join(tempDir, name))
+                onCombined = (lambda body: previewPart(part, body)) if preview else None
+                exportCombined(context, part.sides, core, data.path, scratch, timer, onCombined)
+        except:
+            progress.fail("Export failed!%s %s\n%s" % (
+            fault, sidesText(side1, side2, side3), traceback.format_exc().splitlines()[-1]))
+            return None
+        # The cache takes its own copy once the part is in place
+        signed[part.face] = (None if bundle else key, signature)
+        with timer.stage("doEvents"):
+            adsk.doEvents()
+        progress.step()
+        return data
+
+    """ Runs on the writer thread once a part is in place. """
+    def written(part, path):
+        key, signature = signed.pop(part.face)
+        if key:
+            cache.store(key, path)
+        placed.append((part.face, os.path.basename(path)))
+        if journal:
+            journal.record(part.name, os.path.basename(path))
+        if faces:
+            faces.record(part.face, part.name, signature, os.path.basename(path))
 
+    sideIter = meshIter(mesh)
 
-        validate(face, side1.length, side2.length, side3.length, validateColor)
+    # Validate every face before anything is exported
+    with timer.stage("preflight"):
+        check = preflightCheck(sideIter.topology, context.minAlt, digits)
+        if validateColor or preflight:
+            colorFaces(sideIter.topology, check, context)
+    if preflight:
+        reportPath = os.path.join(saveDir, meshName + "_preflight.json")
+        check.writeJson(reportPath)
+        ui.messageBox("%s\n\nReport written to %s" % (
+        "\n".join(check.problems()) or "No problems found", reportPath), "Mesh Maker Pre-flight")
+        return
+    if not check.exportable():
+        ui.messageBox("The mesh can't be exported:\n" + "\n".join(check.problems()), "Mesh Maker")
+        return
+    # Where every part sits on the mesh, for the preview and the assembly manifest
+    with timer.stage("placement"):
+        frames = transformTable(sideIter.topology)
+    # Visit neighbouring faces together so they are exported, previewed and
+    # numbered together
+    with timer.stage("order"):
+        order = faceOrder(sideIter.topology, ordering)
+    # Hand the cheapest bit patterns to the edges instead of numbering them
+    # in visiting order, the hinges stay the same
+    numbering = None
+    codes = None
+    if renumber:
+        with timer.stage("renumber"):
+            numbering = edgeNumbering(sideIter.topology, digits, order)
+        codes = numbering.codes
+    summary = ""
+    for problem in check.problems():
+        summary += "\n" + problem
+    if numbering and not numbering.optimized:
+        summary += "\nEdges will keep the visiting order, %i digits have too few distinct bit patterns to renumber them" % numbering.totalDigits
+
+    # Pick up where an earlier run into the same directory stopped. The journal
+    # and the part cache track loose files, a bundle is always written whole
+    journal = None
+    faces = None
+    if not debug and not bundle:
+        names = [part.name for part in pipeline.plan(pipeline.traverse(sideIter.topology, codes, order), meshName)]
+        journal = exportJournal(saveDir, meshName, names, templateHash)
+        faces = faceManifest(saveDir, meshName)
+        if reuse and journal.done:
+            summary += "\n%i parts were finished by an earlier run and will be skipped" % len(journal.done)
+        for problem in journal.problems[:5]:
+            summary += "\n" + problem
+
+    for warning in context.warnings:
+        summary += "\n" + warning
+
+    yn = ui.messageBox("There are %r total faces with %.0f unique edges%s" % (
+    mesh.faces.count, uniqueEdges, summary), "Mesh Maker", 1)
+    if yn != 0:
+        return True
+    if journal:
+        journal.start()
+    # Iterate through the Mesh and export the stls
+    # TEST handles the "num triangles to test" input
+    total = sideIter.topology.faceCount()
+    if testNum > 0:
+        total = min(total, int(testNum))
+    progress = progressReporter(total, fusionProgressSink("Mesh Maker", total))
+    tempDir = tempfile.mkdtemp(prefix="MeshMaker")
+    scratch = None
+    if useScratch and not synthesize and not debug:
+        scratch = scratchDesign()
+    # Parts already on the assembly from an earlier run aren't placed twice.
+    # New parts wait in previewQueue so the whole preview is a single base
+    # feature on the mesh design's timeline rather than one feature per face
+    previewBodies = {}
+    previewQueue = {}
+    if preview:
+        previewBodies = bodiesByName(meshComp)
+    archive = None
+    if bundle and not debug:
+        archive = partArchive(os.path.join(saveDir, meshName + ".zip"))
+    writer = backgroundWriter(compress=compress, archive=archive)
+    # The faces run through the pipeline's stages, building on this thread
+    # as Fusion needs and writing on the writer's
+    parts = pipeline.plan(pipeline.traverse(sideIter.topology, codes, order), meshName)
+    if testNum > 0:
+        parts = itertools.islice(parts, int(testNum))
+    parts = pipeline.validate(parts, context.minAlt)
+    parts = pipeline.build(parts, builder)
+    parts = pipeline.deliver(parts, writer, saveDir, written, info=bool(bundle))
+    placed = []
+    # Cache key and face signature of the parts on their way to the writer
+    signed = {}
+    try:
+        for i, part in enumerate(parts):
+            if progress.cancelled():
+                progress.problem("Canceled after %i faces" % (i + 1))
+                break
+        else:
+            # Only a run over every face knows which old parts are stale
+            if faces and testNum <= 0:
+                for stored in faces.finish(names, lambda name: os.path.basename(writer.finalPath(name))):
+                    writer.remove(os.path.join(saveDir, stored))
+    finally:
+        if previewQueue:
+            with timer.stage("previewPlace"):
+                try:
+                    previewBodies.update(placeBodies(meshComp, list(previewQueue.items())))
+                except:
+                    progress.problem("Preview failed!\n" + traceback.format_exc().splitlines()[-1])
+        with timer.stage("writerDrain"):
+            for error in writer.close():
+                progress.problem("Write failed! " + error)
+        progress.close()
         if not debug:
-            if update(side1, side2, side3):
-                return True
-            export(side1, side2, side3, face)
-            #update(250.0, 250.0, 250.0)
-        if report:
-            ui.messageBox("s1: %d, %.3f, %r\ns2: %d, %.3f, %r\ns3: %d, %.3f, %r" % (
-            side1.index, side1.length, side1.hinge, side2.index, side2.length, side2.hinge,
-            side3.index, side3.length, side3.hinge))
-
-    """ Export a triangle with the given sides. This involves combining
-        the proper hinges to the frame body and then exporting the frame body. """
-    def export(side1, side2, side3, face):
-
-        exportMgr = templateDesign.exportManager
-        importMgr = app.importManager
-        fileName = "\\%s_%i_%i_%i__%.3f_%.3f_%.3f" % (
-        mesh.parentComponent.name, side1.index, side2.index, side3.index,
-        side1.length, side2.length, side3.length)
-
-        """ Place the triangle being assembled on the main assembly. """
-        def preview():
-            tempComp = combine.bodies.item(0).parentComponent
-
-            exportOptions = exportMgr.createSATExportOptions(saveDir + fileName + ".sat", tempComp)
-            exportMgr.execute(exportOptions)
-            importOptions = importMgr.createSATImportOptions(saveDir + fileName + ".sat")
-            importMgr.importToTarget(importOptions, meshComp)
-
-            occ = findOccByName(fileName[1:] + ":1", meshComp)
-            if occ:
-                body = occ.component.bRepBodies.item(0)
-                body = body.createForAssemblyContext(occ)
-            move(body, face)
-
-        def move(body, face):
-            # Create a collection of entities for move
-            moveBody = adsk.core.ObjectCollection.create()
-            moveBody.add(body)
-
-            # Create a transform to do move
-            transform = adsk.core.Matrix3D.create()
-            inputs = originInputs() + faceInputs(face, side1, side2, side3)
-            transform.setToAlignCoordinateSystems(*inputs)
-
-            # Create a move feature
-            moveFeats = meshComp.features.moveFeatures
-            moveFeatureInput = moveFeats.createInput(moveBody, transform)
-            moveFeats.add(moveFeatureInput)
-
+            if journal:
+                journal.close()
+            if not bundle:
+                cache.save()
+                faces.save()
+            writeAssembly(assemblyPath(saveDir, meshName), frames, sorted(placed), context.thickness * 10)
+        if scratch:
+            scratch.close()
+        try:
+            os.rmdir(tempDir)
+        except OSError:
+            pass
+    summary = progress.summary()
+    if archive:
+        summary += "\nParts bundled into " + archive.path
+    elif not debug:
+        summary += "\n" + cache.report()
+        summary += "\n" + faces.report()
+    summary += "\n" + context.report()
+    if numbering:
+        # Estimate the combine time per bit body from the parts combined this run
+        secondsPerBody = None
+        combine = timer.stats().get("combine")
+        if combine and numbering.optimizedBodies():
+            bodiesPerPart = numbering.optimizedBodies() / float(sideIter.topology.faceCount())
+            secondsPerBody = combine["total"] / (combine["count"] * bodiesPerPart)
+        summary += "\n" + numbering.report(secondsPerBody)
+    if timing:
+        timingPath = os.path.join(saveDir, meshName + "_timings")
+        timer.writeJson(timingPath + ".json")
+        timer.writeCsv(timingPath + ".csv")
+        summary += "\n\n" + timer.report()
+    ui.messageBox(summary, "Mesh Maker")
+
+
+""" Shows a progressReporter in Fusion's progress dialog and writes its notes
+    to the Text Commands palette, nothing here waits on the user. """
+class fusionProgressSink:
+
+    def __init__(self, title, total):
+        self.dialog = ui.createProgressDialog()
+        self.dialog.isCancelButtonShown = True
+        self.dialog.show(title, "Starting", 0, max(total, 1), 0)
+        self.palette = ui.palettes.itemById("TextCommands")
+    @property
+    def wasCancelled(self):
+        return self.dialog.wasCancelled
+    def update(self, reporter):
+        self.dialog.progressValue = reporter.processed()
+        self.dialog.message = reporter.status()
+    def note(self, message):
+        if self.palette:
+            self.palette.writeText(message)
+    def close(self, reporter):
+        self.dialog.hide()
+
+""" Set the template's side parameters to the lengths of the sides. """
+def setSides(context, side1, side2, side3):
+    context.s1.expression = "%.3f mm" % side1.length
+    context.s2.expression = "%.3f mm" % side2.length
+    context.s3.expression = "%.3f mm" % side3.length
+
+""" Combine the frame with the bit and hinge bodies of the sides and the core
+    body, if any, and export the result to path as STL. With a scratchDesign
+    copies are combined in memory and the template's timeline is never
+    touched, otherwise the combine feature is added to the template and
+    removed again once exported. onCombined(body) gets the combined body
+    while it's still there. """
+def exportCombined(context, sides, core, path, scratch, timer, onCombined=None):
+    with timer.stage("proxies"):
         combineBodies = []
-        combineBodies.extend(binaryBodies(side1, b1, digits))
-        combineBodies.extend(binaryBodies(side2, b2, digits))
-        combineBodies.extend(binaryBodies(side3, b3, digits))
-
-
-        combineBodies.extend(hingeBodies(side1, 1))
-        combineBodies.extend(hingeBodies(side2, 2))
-        combineBodies.extend(hingeBodies(side3, 3))
-
-        core = coreBodies(face)
+        for sideNum, side in enumerate(sides):
+            combineBodies.extend(context.bitBodies(side, sideNum + 1))
+        for sideNum, side in enumerate(sides):
+            combineBodies.extend(context.hingeBodies(side, sideNum + 1))
         if core:
             combineBodies.append(core)
 
-        combines = templateComp.features.combineFeatures
+    if scratch:
+        # Union copies of the bodies in memory and export from the scratch
+        # design, the template's timeline is never touched
+        with timer.stage("combine"):
+            partBody = scratch.combine(context.center, combineBodies)
+        with timer.stage("stlExport"):
+            scratch.export(partBody, path)
+        if onCombined:
+            with timer.stage("preview"):
+                onCombined(partBody)
+        return
 
+    with timer.stage("combine"):
+        combines = context.comp.features.combineFeatures
         bodyCollection = adsk.core.ObjectCollection.create()
         for bod in combineBodies:
             bodyCollection.add(bod)
-        combInput = combines.createInput(center, bodyCollection)
+        combInput = combines.createInput(context.center, bodyCollection)
         combInput.isNewComponent = True
         combine = combines.add(combInput)
-
-
-        exportOptions = exportMgr.createSTLExportOptions(center, saveDir + fileName + ".stl")
+        partBody = combine.bodies.item(0)
+    with timer.stage("stlExport"):
+        exportMgr = context.design.exportManager
+        exportOptions = exportMgr.createSTLExportOptions(context.center, path)
         exportMgr.execute(exportOptions)
-
-        if preview:
-            preview()
-
-        """tempComp = combine.bodies.item(0).parentComponent
-        occs = tempComp.allOccurrences
-        ui.messageBox(str(occs.count))
-        for i in range(occs.count):
-            occs.item(i).deleteMe()"""
+    if onCombined:
+        with timer.stage("preview"):
+            onCombined(partBody)
+    with timer.stage("cleanup"):
         combine.deleteMe()
-            
-
-        timeline = templateDesign.timeline
+        timeline = context.design.timeline
         tempFeature = timeline.item(timeline.markerPosition - 1).entity
         tempFeature.deleteMe()
 
-        os.remove(saveDir + fileName + ".sat")
-
-
-        adsk.doEvents()
-        #app.activeViewport.refresh()
-
-    yn = ui.messageBox("There are %r total faces with %.0f unique edges" % (
-    mesh.faces.count, uniqueEdges), "Mesh Maker", 1)
-    if yn != 0:
-        return True
-    # Iterate through the Mesh and export the stls
-    # TEST handles the "num triangles to test" input
-    sideIter = meshIter(mesh)
-    try:
-        i = 0
-        test = False
-        if testNum > 0:
-            test = True
-        while not test or testNum > 0:
-            temp = sideIter.next()
-            if not temp:
-                return
-            sideTup = temp[0]
-            face = temp[1]
-            cancel = process()
-            if cancel:
-                ui.messageBox("Canceled with error")
-                return
-            i += 1
-            testNum -= 1
-    except StopIteration:
-        return
-
-
-""" Given a single side, return the bodies necessary to create its binary bit
-    pattern and its proper concavity indicator. """
-def binaryBodies(side, bitOcc, totalDigits):
-    digits = side.index.bit_length()
-    binary = str(bin(side.index))[2:]
-    returnBodies = []
-    offset = (totalDigits - digits) // 2
-
-    bodies = bitOcc.component.bRepBodies
-
-    leftTopcc = proxyBody(bodies, bitOcc, "lConcavet")
-    rightTopcc = proxyBody(bodies, bitOcc, "rConcavet")
-    leftBotcc = proxyBody(bodies, bitOcc, "lConcaveb")
-    rightBotcc = proxyBody(bodies, bitOcc, "rConcaveb")
-
-    if not (leftTopcc and rightTopcc and leftBotcc and rightBotcc):
-        return
-
-    topBits = []
-    botBits = []
-    i = 1
-    while (i <= totalDigits):
-        topBit = proxyBody(bodies, bitOcc, "%rt" % i)
-        if not topBit:
-            ui.messageBox("Missing bit named '%rt'" % i)
-            return
-        topBits.append(topBit)
-
-        botBit = proxyBody(bodies, bitOcc, "%rb" % i)
-        if not botBit:
-            ui.messageBox("Missing bit named '%rt'" % i)
+""" Return a one line description of a triangle's sides. """
+def sidesText(side1, side2, side3):
+    return "s1: %d, %.3f, %r  s2: %d, %.3f, %r  s3: %d, %.3f, %r" % (
+    side1.index, side1.length, side1.hinge, side2.index, side2.length, side2.hinge,
+    side3.index, side3.length, side3.hinge)
+
+""" Resolves everything makeMesh needs from the template once per run: the
+    hinge and bit occurrences, proxies of all their bodies, the parameters and
+    the validation appearances. Per face lookups are then dictionary reads.
+    problems lists anything missing that stops a run, warnings anything that
+    only disables a feature. apiCalls counts the API calls made building the
+    context, savedCalls the calls the per face lookups would have made. """
+class templateContext:
+
+    def __init__(self, design):
+        self.design = design
+        self.comp = design.rootComponent
+        self.problems = []
+        self.warnings = []
+        self.apiCalls = 2
+        self.savedCalls = 0
+        self.bodies = {}
+
+        # Find the Hinge components, frame and binary bit patterns
+        occs = self.comp.occurrences
+        self.fOccs = [self.item(occs, name, "Female hinge component") for name in (fStr1, fStr2, fStr3)]
+        self.mOccs = [self.item(occs, name, "Male hinge component") for name in (mStr1, mStr2, mStr3)]
+        self.bOccs = [self.item(occs, name, "Binary bit pattern") for name in (bStr1, bStr2, bStr3)]
+        self.center = self.body(cs)
+        if not self.center:
+            self.problems.append("Center (Body '" + cs + "') not found")
+        fBodies = [self.body(name) for name in (fStr1l, fStr1r, fStr2l, fStr2r, fStr3l, fStr3r)]
+        if not all(fBodies):
+            self.problems.append("A female hinge body wasn't found (" + fStr1l +", " + fStr1r + ", " + fStr2l + "...)")
+        core = self.body(coreStr)
+
+        # Find the parameters
+        self.params = design.userParameters
+        self.apiCalls += 1
+        self.s1 = self.item(self.params, "sideOne", "Parameter")
+        self.s2 = self.item(self.params, "sideTwo", "Parameter")
+        self.s3 = self.item(self.params, "sideThree", "Parameter")
+        digits = self.item(self.params, "binaryDigits", "Parameter")
+        minAlt = self.item(self.params, "minAltitude", "Parameter")
+        thick = self.item(self.params, "thickness", "Parameter")
+        self.digits = int(digits.value) if digits else 0
+        self.minAlt = minAlt.value * 10 if minAlt else 0.0
+        self.thickness = thick.value if thick else 0.0
+        self.apiCalls += 3
+
+        # Find the appearances bad triangles are colored with
+        apps = design.appearances
+        self.badAlt = apps.itemByName("Short Altitude")
+        self.badSide = apps.itemByName("Short Side")
+        self.apiCalls += 3
+        if not self.badAlt or not self.badSide:
+            self.warnings.append("Appearance 'Short Altitude' or appearance 'Short Side' not found")
+        if self.problems:
             return
-        botBits.append(botBit)
-        i += 1
-
-    if side.hinge == hingeType.female:
-        topBits = list(reversed(topBits))
-        botBits = list(reversed(botBits))
-        returnBodies.append(leftBotcc)
-        if side.convex:
-            returnBodies.append(rightTopcc)
-            returnBodies.append(rightBotcc)
-    else:
-        returnBodies.append(rightBotcc)
-        if side.convex:
-            returnBodies.append(leftTopcc)
-            returnBodies.append(leftBotcc)
-
-
-    #ui.messageBox("binary: %r    totalDigits: %s    Digits: %s  Offset: %s" % (binary, totalDigits, digits, offset))
-    for i in range(int(totalDigits)):
-        #ui.messageBox("i - offset: %i" % (i - int(offset)))
-        if digits % 2 == 1:
-            strIndex = i - int(offset)
-            #ui.messageBox("strIndex: %r    binary: %r" % (strIndex, binary))
-        else:
-            strIndex = i - int(offset) - 1
-            #ui.messageBox("strIndex: %r    binary: %r" % (strIndex, binary))
-        if i < offset or i >= totalDigits - offset:
-            returnBodies.append(botBits[i])
-        #ui.messageBox("binary: %r    index: %i" % (binary, i - int(offset)))
-        elif not strIndex < 0 and binary[strIndex] == '1':
-            returnBodies.append(botBits[i])
-            returnBodies.append(topBits[i])
-    return returnBodies
-
-""" Given the name of a body, its parent occurence and the bodies within
-    the occurence's component, return the body's proxy. """
-def proxyBody(compBodies, occ, name):
-    body = compBodies.itemByName(name)
-
-    if not body:
-        ui.messageBox('Component body named "%s" not found' % name)
-        return
 
-    return body.createForAssemblyContext(occ)
-
-""" A basic class describing the side of a triangle. """
-class Side:
-    def __init__(self, index, length, hinge, convex):
-        self.index = index
-        self.length = length
-        self.hinge = hinge
-        self.convex = convex
-
-""" Return True if the edge represents a convex hinge, return false otherwise.
-    Code provided by Brian Ekins. """
-def convex(edge):
-    if openEdge(edge):
-        return False
-    try:
-        # Get the two faces connected by the edge and get the normal of each face.
-        face1 = edge.faces.item(0)
-        face2 = edge.faces.item(1)
-        ret = face1.evaluator.getNormalAtPoint(face1.pointOnFace)
-        normal1 = ret[1]
-        ret = face2.evaluator.getNormalAtPoint(face2.pointOnFace)
-        normal2 = ret[1]
-
-        # Get the co-edge of the selected edge for face1.
-        if edge.coEdges.item(0).loop.face == face1:
-            coEdge = edge.coEdges.item(0)
-        elif edge.coEdges.item(1).loop.face == face1:
-            coEdge = edge.coEdges.item(1)
-
-        # Create a vector that represents the direction of the co-edge.
-        if coEdge.isOpposedToEdge:
-            edgeDir = edge.startVertex.geometry.vectorTo(edge.endVertex.geometry)
+        # Proxy every hinge body, the lists only differ by hinge type
+        self.hinges = []
+        for sideNum in range(3):
+            fOcc, mOcc = self.fOccs[sideNum], self.mOccs[sideNum]
+            male = self.proxies(mOcc)
+            female = self.proxies(fOcc) + fBodies[2*sideNum:2*sideNum + 2]
+            extra = [core] if core else []
+            self.hinges.append({
+                hingeType.male: (male + extra, 3*len(male) + 3),
+                hingeType.female: (female + extra, 3*(len(female) - 2) + 3),
+                hingeType.openEdge: (extra, 3),
+            })
+
+        # Proxy every bit body
+        self.layouts = layoutTable(self.digits)
+        self.bits = []
+        for bOcc in self.bOccs:
+            bodies = bOcc.component.bRepBodies
+            self.apiCalls += 2
+            bits = {}
+            names = ["lConcavet", "rConcavet", "lConcaveb", "rConcaveb"]
+            for i in range(1, self.digits + 1):
+                names.append("%rt" % i)
+                names.append("%rb" % i)
+            for name in names:
+                body = bodies.itemByName(name)
+                self.apiCalls += 1
+                if not body:
+                    self.problems.append("Missing bit named '%s' in %s" % (name, bOcc.name))
+                    continue
+                bits[name] = body.createForAssemblyContext(bOcc)
+                self.apiCalls += 1
+            self.bits.append(bits)
+        # binaryBodies looked up and proxied every bit on every call
+        self.bitCalls = 2 + 2*len(names)
+
+    """ Return collection.itemByName(name), recording a problem if it's missing. """
+    def item(self, collection, name, kind):
+        rv = collection.itemByName(name)
+        self.apiCalls += 1
+        if not rv:
+            self.problems.append("%s '%s' not found" % (kind, name))
+        return rv
+
+    """ Return the template root body with the given name, or None. """
+    def body(self, name):
+        if name not in self.bodies:
+            self.bodies[name] = self.comp.bRepBodies.itemByName(name)
+            self.apiCalls += 2
         else:
-            edgeDir = edge.endVertex.geometry.vectorTo(edge.startVertex.geometry)
-
-        # Get the cross product of the face normals.
-        cross = normal1.crossProduct(normal2)
-
-        # Check to see if the cross product is in the same or opposite direction
-        # of the co-edge direction.  If it's opposed then it's a convex angle.
-        if edgeDir.angleTo(cross) > math.pi/2:
-            return True
-        else:
-            return False
-    except:
-        if ui:
-            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+            self.savedCalls += 2
+        return self.bodies[name]
+
+    """ Return proxies of every body in the occurrence's component. """
+    def proxies(self, occ):
+        rv = []
+        for body in occ.component.bRepBodies:
+            rv.append(body.createForAssemblyContext(occ))
+            self.apiCalls += 2
+        self.apiCalls += 2
+        return rv
+
+    """ Given a single side, return the bodies necessary to create its binary
+        bit pattern and its proper concavity indicator. """
+    def bitBodies(self, side, sideNum):
+        bits = self.bits[sideNum - 1]
+        self.savedCalls += self.bitCalls
+        return [bits[name] for name in self.layouts.names(side.index, side.hinge, side.convex)]
+
+    """ Return the hinge bodies (and template center body if any) for a side. """
+    def hingeBodies(self, side, sideNum):
+        bodies, calls = self.hinges[sideNum - 1][side.hinge]
+        self.savedCalls += calls
+        return bodies
+
+    """ Return the name, volume and area of every body parts are made from,
+        measured with the sides at referenceSide so the center body doesn't
+        depend on the last face exported. The sides are put back after. """
+    def geometry(self):
+        sides = (self.s1, self.s2, self.s3)
+        expressions = [side.expression for side in sides]
+        for side in sides:
+            side.expression = "%.3f mm" % referenceSide
+        try:
+            bodies = [self.center]
+            for hinges in self.hinges:
+                for kind in sorted(hinges):
+                    bodies.extend(hinges[kind][0])
+            for bits in self.bits:
+                bodies.extend(bits[name] for name in sorted(bits))
+            self.apiCalls += 3*len(bodies)
+            return [(body.name, round(body.volume, 6), round(body.area, 6)) for body in bodies]
+        finally:
+            for side, expression in zip(sides, expressions):
+                side.expression = expression
+
+    def report(self):
+        return "Template context: %i API calls up front, %i per face API calls avoided" % (
+            self.apiCalls, self.savedCalls)
 
 """ An iterator that iterates through a given bRep object, returns a list
-    containing three Side objects for each triangular face in the bRep object. """
+    containing three Side objects and the BRepFace for each triangular face in
+    the bRep object. The mesh's topology is read once up front by fromBRep,
+    faces that aren't triangles are skipped (the pre-flight check reports
+    them). """
 class meshIter:
 
     def __init__(self, mesh):
         self.mesh = mesh
-
-        self.faces = mesh.faces
-        self.f = 0
-        self.fCount = self.faces.count
-
-        self.visitedEdges = []
+        self.topology = fromBRep(mesh)
+        self.plan = planIter(self.topology)
     def __iter__(self):
         return self
-    def next(self):
-        while (self.f < self.fCount):
-            face = self.faces.item(self.f)
-            edges = face.edges
-            eCount = edges.count
-            if eCount > 3:
-                ui.messageBox("Non-triangular face found")
-                return False
-            rv = []
-            e = 0
-            while (e < eCount):
-                edge = edges.item(e)
-                length = brepLength(edge)
-                try:
-                    edgeNum = self.visitedEdges.index(edge)
-                    if (edgeNum % 2 == 0):
-                        hinge = hingeType.female
-                    else:
-                        hinge = hingeType.male
-                except ValueError:
-                    edgeNum = len(self.visitedEdges)
-                    self.visitedEdges.append(edge)
-                    if openEdge(edge):
-                        hinge = hingeType.openEdge
-                    elif (edgeNum % 2 == 0):
-                        hinge = hingeType.male
-                    else:
-                        hinge = hingeType.female
-                rv.append(Side(edgeNum, length, hinge, convex(edge)))
-                e += 1
-
-            self.f += 1
-            return rv, face
-        raise StopIteration()
-
-""" Confirm that a triangle has valid values, if not, color invalid triangle
-    red and ask if the user wishes to cancel. """
-def validate(face, s1, s2, s3, color):
-    try:
-        paramList = templateDesign.userParameters
-
-        minAlt = paramList.itemByName("minAltitude")
-        if not minAlt:
-            ui.messageBox("Parameter 'minAltitude' not found")
-
-
-        libs = app.materialLibraries
-        lib = libs.itemByName("Fusion 360 Appearance Library")
-        #for lib in libs:
-        #    ui.messageBox(str(lib.name))
-        if not lib:
-            ui.messageBox("Material library 'Fusion 360 Appearance Library' not found")
-        apps = lib.appearances
-
-
-        apps = templateDesign.appearances
-        badAlt = apps.itemByName("Short Altitude")
-        badSide = apps.itemByName("Short Side")
-        if not badAlt or not badSide:
-            ui.messageBox("Appearance 'Short Altitude' or appearance 'Short Side' not found")
-        if not minAlt:
-            ui.messageBox("Parameter 'minAltitude' not found")
-
-
-        # Scary formula for calculating the smallest altitude of a triangle give three sides, where s1 is largest
-        altitude = ((2*(s1**2)*(s2**2) + 2*(s2**2)*(s3**2) + 2*(s1**2)*(s3**2) - s3**4 - s2**4 - s1**4)**.5) / (2*s1)
-
-        minAlt = minAlt.value * 10
-
-        if s2 < 20 or s3 < 20:
-            if color:
-                face.appearance = badSide
-        elif altitude < minAlt:
-            if color:
-                face.appearance = badAlt
-    except:
-            ui.messageBox('Validate Failed:\n{}'.format(traceback.format_exc()))
-
-
-""" Return the length of the given linear edge in MM. Return value is a double. """
-def brepLength(edge):
-    return edge.startVertex.geometry.distanceTo(edge.endVertex.geometry) * 10
-
-""" Return True if the given edge is associated with only a single face. IE
-    it borders a hole in a mesh and should not be given a hinge. """
-def openEdge(edge):
-    if edge.faces.count == 1:
-        return True
-    return False
-
-def originInputs():
-    paramList = templateDesign.userParameters
-    thick = paramList.itemByName("thickness")
-    if not thick:
-        ui.messageBox("Parameter 'thickness' not found")
-    thick = thick.value/2.0
-    lst = []
-    # fromOrigin
-    lst.append(adsk.core.Point3D.create(0.0, 0.0, thick))
-    # fromX
-    lst.append(adsk.core.Vector3D.create(1.0, 0.0, 0.0))
-    # fromY
-    lst.append(adsk.core.Vector3D.create(0.0, -1.0, 0.0))
-    # fromZ
-    lst.append(adsk.core.Vector3D.create(0.0, 0.0, -1.0))
+    def __next__(self):
+        sideTup, f = next(self.plan)
+        return sideTup, self.topology.faceRefs[f]
+    next = __next__
+
+""" Color every face the pre-flight check flagged in one pass: short sides
+    and faces that aren't triangles get 'Short Side', short altitudes get
+    'Short Altitude'. """
+def colorFaces(topology, check, context):
+    if context.badSide:
+        for f in check.shortSide:
+            topology.faceRefs[f].appearance = context.badSide
+        for face in topology.badFaces:
+            face.appearance = context.badSide
+    if context.badAlt:
+        for f in check.shortAltitude:
+            topology.faceRefs[f].appearance = context.badAlt
+
+
+""" Return the fromOrigin, fromX, fromY and fromZ inputs of a part's frame,
+    placement.partFrame in cm. """
+def originInputs(context):
+    context.savedCalls += 3
+    frame = partFrame(context.thickness * 10)
+    lst = [adsk.core.Point3D.create(*(c / 10.0 for c in frame["origin"]))]
+    for axis in ("x", "y", "z"):
+        lst.append(adsk.core.Vector3D.create(*frame[axis]))
     return lst
 
-def faceInputs(face, side1, side2, side3):
-    edges = face.edges
-    edge1, edge2 = None, None
-    for i in range(edges.count):
-        edge = edges.item(i)
-        length = edgeLength(edge)
-        if length == side1.length:
-            edge1 = edge
-        elif length == side2.length:
-            edge2 = edge
-    if not edge1 or not edge2:
-        ui.messageBox("faceInputs: Edges don't match")
-    point = findSharedPoint(edge1, edge2)
-    if not point:
-        ui.messageBox("faceInputs: Could not find a shared point")
-
-    lst = []
-    # toOrigin
-    lst.append(point)
-    # toX
-    vX = edgeToVector(edge1, point)
-    vX.scaleBy(1.0/vX.length)
-    # toZ
-    success, vZ = face.evaluator.getNormalAtPoint(face.pointOnFace)
-    if not success:
-        ui.messageBox("faceInputs: Couldn't find normal")
-    vZ.scaleBy(1.0/vZ.length)
-    # toY
-    vY = vZ.crossProduct(vX)
-    vY.scaleBy(1.0/vY.length)
-    lst.append(vX)
-    lst.append(vY)
-    lst.append(vZ)
-    message = []
-    for v in lst[1:]:
-        message.append(v.length)
+""" Return the toOrigin, toX, toY and toZ inputs placing a part on face f of
+    a placement.transformTable. """
+def frameInputs(frames, f):
+    origin, x, y, z = frames.frame(f)
+    lst = [adsk.core.Point3D.create(*origin)]
+    for v in (x, y, z):
+        lst.append(adsk.core.Vector3D.create(*v))
     return lst
 
-def findOccByName(name, rootComp):
-    compList = rootComp.allOccurrences
-    for i in range(compList.count):
-        comp = compList.item(i)
-        if comp.name == name:
-            return comp
-    ui.messageBox("findCompByName: Could not find a component named %s" % name)
-    return None
-
-def edgeLength(edge):
-    return 10*edge.startVertex.geometry.distanceTo(edge.endVertex.geometry)
-
-# Returns a point3D object A where A is shared between the two input edges
-def findSharedPoint(edge0, edge1):
-    point0_0 = edge0.startVertex
-    point0_1 = edge0.endVertex
-    point1_0 = edge1.startVertex
-    point1_1 = edge1.endVertex
-    if (point0_0 == point1_0) or (point0_0 == point1_1):
-        pointA = point0_0
-    elif (point0_1 == point1_0) or (point0_1 == point1_1):
-        pointA = point0_1
-    else:
-        return False
-    return pointA.geometry
-
-# Returns a vector aligned with the given edge starting at the given point
-def edgeToVector(edge, point):
-    p1, p2 = edge.startVertex.geometry, edge.endVertex.geometry
-    if point.isEqualTo(p1):
-        return point.vectorTo(p2)
-    elif point.isEqualTo(p2):
-        return point.vectorTo(p1)
-    else:
-        ui.messageBox("edgeToVector: point isn't on edge")
\ No newline at end of file
+""" A throwaway direct modeling design parts are combined and exported in.
+    The template's bodies are copied as temporary BReps and unioned in memory
+    rather than with combine features, so the template's timeline stays the
+    same length however many parts are made. A direct design has no timeline
+    of its own, adding and deleting the export body costs the same every
+    time. The side parameters are still set on the template. """
+class scratchDesign:
+
+    def __init__(self):
+        app = adsk.core.Application.get()
+        active = app.activeDocument
+        self.doc = app.documents.add(adsk.core.DocumentTypes.FusionDesignDocumentType)
+        self.design = self.doc.products.itemByProductType("DesignProductType")
+        self.design.designType = adsk.fusion.DesignTypes.DirectDesignType
+        self.root = self.design.rootComponent
+        self.tbm = adsk.fusion.TemporaryBRepManager.get()
+        # Adding a document activates it, go back to the mesh
+        active.activate()
+
+    """ Return a temporary BRep of body unioned with every body in tools. """
+    def combine(self, body, tools):
+        part = self.tbm.copy(body)
+        for tool in tools:
+            self.tbm.booleanOperation(part, self.tbm.copy(tool), adsk.fusion.BooleanTypes.UnionBooleanType)
+        return part
+
+    """ Export a temporary BRep body as an STL file at path. """
+    def export(self, tempBody, path):
+        body = self.root.bRepBodies.add(tempBody)
+        try:
+            exportMgr = self.design.exportManager
+            exportMgr.execute(exportMgr.createSTLExportOptions(body, path))
+        finally:
+            body.deleteMe()
+
+    def close(self):
+        self.doc.close(False)
+
+""" Return a dict of body name to body for the bodies of comp. """
+def bodiesByName(comp):
+    bodies = comp.bRepBodies
+    return dict((body.name, body) for body in (bodies.item(i) for i in range(bodies.count)))
+
+""" Add a list of (name, temporary BRep body) to comp and return a dict of
+    name to the new body. A parametric design only takes new bodies inside a
+    base feature, the bodies share one. """
+def placeBodies(comp, bodies):
+    placed = {}
+    if not bodies:
+        return placed
+    baseFeature = None
+    if comp.parentDesign.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        baseFeature = comp.features.baseFeatures.add()
+        baseFeature.startEdit()
+    try:
+        for name, tempBody in bodies:
+            if baseFeature:
+                body = comp.bRepBodies.add(tempBody, baseFeature)
+            else:
+                body = comp.bRepBodies.add(tempBody)
+            body.name = name
+            placed[name] = body
+    finally:
+        if baseFeature:
+            baseFeature.finishEdit()
+    return placed
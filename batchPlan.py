@@ -0,0 +1,150 @@
+""" Plans every face of a mesh at once with NumPy.
+
+    The array counterpart of meshCore's per edge/per face helpers. Lengths,
+    altitudes, convexity and the short side/short altitude masks for the whole
+    mesh come out of a handful of array operations instead of a Python loop.
+    NumPy isn't bundled with Fusion 360, check "available" before use and fall
+    back to meshCore when it's missing. """
+
+from meshCore import minSide, hingeType, Side
+
+try:
+    import numpy as np
+    available = True
+except ImportError:
+    np = None
+    available = False
+
+""" Planning results for a whole mesh. All lengths are in mm.
+        edges          - (E, 2) low/high vertex indices of each unique edge
+        faceEdges      - (F, 3) edge of each face side, side k runs from
+                         corner k to corner k + 1
+        edgeFaceCount  - (E,) number of faces bordering each edge
+        edgeLengths    - (E,) edge lengths
+        edgeOpen       - (E,) True where an edge borders a single face
+        edgeConvex     - (E,) True where an edge is a convex hinge
+        sideLengths    - (F, 3) length of each face side
+        altitudes      - (F,) smallest altitude of each face
+        shortSide      - (F,) faces with a side under meshCore.minSide
+        shortAltitude  - (F,) remaining faces with an altitude under minAlt
+    Edge numbering here is by vertex pair, see visit() for meshIter's
+    visiting order. """
+class meshPlan:
+
+    def __init__(self, vertices, faces, minAlt=0.0):
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        fCount = len(faces)
+
+        # Every face side as a sorted vertex pair, unique pairs are the edges
+        starts = faces
+        ends = np.roll(faces, -1, axis=1)
+        vCount = max(len(vertices), 1)
+        pairKeys = (np.minimum(starts, ends) * vCount + np.maximum(starts, ends)).reshape(-1)
+        edgeKeys, inverse = np.unique(pairKeys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        self.edges = np.stack((edgeKeys // vCount, edgeKeys % vCount), axis=-1)
+        self.faceEdges = inverse.reshape(fCount, 3)
+        self.edgeFaceCount = np.bincount(inverse, minlength=len(self.edges))
+        self.edgeOpen = self.edgeFaceCount == 1
+
+        # Lengths, the mesh is in cm
+        edgeVectors = vertices[self.edges[:, 1]] - vertices[self.edges[:, 0]]
+        self.edgeLengths = np.sqrt(np.einsum("ij,ij->i", edgeVectors, edgeVectors)) * 10
+        self.sideLengths = self.edgeLengths[self.faceEdges]
+
+        # Smallest altitude, the same formula as meshCore.triangleAltitude
+        ordered = -np.sort(-self.sideLengths, axis=1)
+        s1, s2, s3 = ordered[:, 0], ordered[:, 1], ordered[:, 2]
+        square = 2*(s1**2)*(s2**2) + 2*(s2**2)*(s3**2) + 2*(s1**2)*(s3**2) - s3**4 - s2**4 - s1**4
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.altitudes = np.sqrt(np.clip(square, 0.0, None)) / (2*s1)
+
+        self.shortSide = (s2 < minSide) | (s3 < minSide)
+        self.shortAltitude = ~self.shortSide & (self.altitudes < minAlt)
+
+        # Convexity, group the face sides by edge and test the far corner of
+        # the second face against the plane of the first
+        a, b, c = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+        normals = np.cross(b - a, c - a)
+        order = np.argsort(inverse, kind="stable")
+        firstSlot = np.searchsorted(inverse[order], np.arange(len(self.edges)))
+        self.edgeConvex = np.zeros(len(self.edges), dtype=bool)
+        shared = np.nonzero(self.edgeFaceCount == 2)[0]
+        if len(shared):
+            slot0 = order[firstSlot[shared]]
+            slot1 = order[firstSlot[shared] + 1]
+            f0, f1 = slot0 // 3, slot1 // 3
+            far = faces[f1, (slot1 % 3 + 2) % 3]
+            offset = vertices[far] - vertices[self.edges[shared, 0]]
+            n0 = normals[f0]
+            dots = np.einsum("ij,ij->i", n0, offset)
+            scale = np.sqrt(np.einsum("ij,ij->i", n0, n0) * np.einsum("ij,ij->i", offset, offset))
+            self.edgeConvex[shared] = dots < -1e-9 * scale
+
+    def faceCount(self):
+        return len(self.faceEdges)
+
+    def edgeCount(self):
+        return len(self.edges)
+
+    """ Return the indices of the faces that fail validation. """
+    def badFaces(self):
+        return np.nonzero(self.shortSide | self.shortAltitude)[0]
+
+    """ Number the edges the way planIter does, visiting faces in order (all
+        faces in face order when None) and renumbering by codes if given, see
+        meshCore.edgeRegistry. Sets
+            sideIndex - (F, 3) edge index of each face side
+            sideHinge - (F, 3) hinge of each face side as an index into
+                        hingeNames
+        and returns self. """
+    def visit(self, order=None, codes=None):
+        if order is None:
+            order = np.arange(self.faceCount())
+        order = np.asarray(order, dtype=np.int64)
+        flat = self.faceEdges[order].reshape(-1)
+        # An edge's index is the rank of its first appearance
+        edgeIds, first = np.unique(flat, return_index=True)
+        visitIndex = np.empty(self.edgeCount(), dtype=np.int64)
+        visitIndex[edgeIds[np.argsort(first)]] = np.arange(len(edgeIds))
+        index = visitIndex[flat]
+        isFirst = np.zeros(len(flat), dtype=bool)
+        isFirst[first] = True
+        odd = index % 2
+        # First visits get male on even indices, later visits the other hinge
+        hinge = np.where(isFirst, odd, 1 - odd)
+        hinge[isFirst & self.edgeOpen[flat]] = hingeNames.index(hingeType.openEdge)
+        if codes is not None:
+            index = np.asarray(codes, dtype=np.int64)[index]
+        self.sideIndex = np.empty((self.faceCount(), 3), dtype=np.int64)
+        self.sideHinge = np.empty((self.faceCount(), 3), dtype=np.int8)
+        self.sideIndex[order] = index.reshape(-1, 3)
+        self.sideHinge[order] = hinge.reshape(-1, 3)
+        self.order = order
+        return self
+
+    """ Return the three Side objects of face f, after visit(). """
+    def sides(self, f):
+        rv = []
+        for k in range(3):
+            e = self.faceEdges[f, k]
+            rv.append(Side(int(self.sideIndex[f, k]), float(self.sideLengths[f, k]),
+                           hingeNames[self.sideHinge[f, k]], bool(self.edgeConvex[e])))
+        return rv
+
+""" Hinges by the codes meshPlan.visit stores. """
+hingeNames = (hingeType.male, hingeType.female, hingeType.openEdge)
+
+""" Yield (face index, sides) for every face of a meshPlan in visiting order,
+    like pipeline.traverse does for a meshTopology. Side objects only exist
+    for the face being yielded. """
+def traverse(plan, order=None, codes=None):
+    plan.visit(order, codes)
+    for f in plan.order:
+        f = int(f)
+        yield f, plan.sides(f)
+
+""" Plan a meshCore.meshTopology. """
+def planTopology(topology, minAlt=0.0):
+    return meshPlan(topology.vertices, topology.faces, minAlt)
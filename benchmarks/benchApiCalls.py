@@ -0,0 +1,74 @@
+""" Counts Fusion API calls per face for mesh traversal.
+
+    Run with plain python, no Fusion needed:
+        python benchmarks/benchApiCalls.py
+    Wraps a synthetic mesh in the fake adsk stand-in with every property read
+    and method call counted, then traverses it two ways:
+        legacy   - the original meshIter, which measured, tested openness of
+                   and evaluated convexity for every side of every face
+        edges    - fromBRep and the per edge table planIter reads from
+    and prints API calls per face for each. """
+
+import math
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import meshTopology, planIter, edgeRegistry
+from meshIO import fromBRep
+from fakeAdsk import fakeBody, apiCounter, counted
+from benchTraversal import gridMesh
+
+""" The convexity test meshIter used to run per face side. Code provided by
+    Brian Ekins. """
+def legacyConvex(edge):
+    if edge.faces.count == 1:
+        return False
+    face1 = edge.faces.item(0)
+    face2 = edge.faces.item(1)
+    normal1 = face1.evaluator.getNormalAtPoint(face1.pointOnFace)[1]
+    normal2 = face2.evaluator.getNormalAtPoint(face2.pointOnFace)[1]
+    if edge.coEdges.item(0).loop.face == face1:
+        coEdge = edge.coEdges.item(0)
+    else:
+        coEdge = edge.coEdges.item(1)
+    if coEdge.isOpposedToEdge:
+        edgeDir = edge.startVertex.geometry.vectorTo(edge.endVertex.geometry)
+    else:
+        edgeDir = edge.endVertex.geometry.vectorTo(edge.startVertex.geometry)
+    cross = normal1.crossProduct(normal2)
+    return edgeDir.angleTo(cross) > math.pi/2
+
+""" Walk the body the way the original meshIter did. """
+def legacyTraverse(body):
+    registry = edgeRegistry()
+    faces = body.faces
+    for f in range(faces.count):
+        edges = faces.item(f).edges
+        for e in range(edges.count):
+            edge = edges.item(e)
+            # The side length read, its API calls are what's counted
+            edge.startVertex.geometry.distanceTo(edge.endVertex.geometry)
+            registry.visit(edge, edge.faces.count == 1)
+            legacyConvex(edge)
+
+def edgeTableTraverse(body):
+    for sideTup, f in planIter(fromBRep(body)):
+        pass
+
+def main():
+    print("%8s %14s %14s" % ("faces", "legacy/face", "edges/face"))
+    for n in (5, 10, 20, 40):
+        vertices, faces = gridMesh(n)
+        # Lift the grid into a bumpy surface so convexity varies
+        vertices = [(x, y, math.sin(x) * math.cos(y)) for x, y, z in vertices]
+        body = fakeBody(meshTopology(vertices, faces, name="grid"))
+        results = []
+        for traverse in (legacyTraverse, edgeTableTraverse):
+            counter = apiCounter()
+            traverse(counted(body, counter))
+            results.append(counter.calls / float(len(faces)))
+        print("%8i %14.1f %14.1f" % (len(faces), results[0], results[1]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+""" Compares the face orderings on the synthetic meshes.
+
+    Run with plain python, no Fusion needed:
+        python benchmarks/benchOrdering.py [--quick]
+    For every ordering in faceOrder and every mesh from meshGenerators it
+    prints
+        order    - seconds to compute the ordering
+        export   - seconds to plan the mesh in that order and synthesize the
+                   first partSample parts, the headless export
+        preview  - seconds to build the transform table and look up the
+                   placement frame of every face in that order, the headless
+                   part of the preview
+        jump     - mean distance (mm) between consecutive faces' centroids,
+                   how far the preview moves from one part to the next
+        spread   - mean spread of the edge indices on a part, low when
+                   neighbouring parts share close edge numbers
+    The mesh order as it comes from the generators is the baseline. """
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import digitsNeeded
+from faceOrder import orderings, faceOrder
+from placement import transformTable
+import partGen
+import pipeline
+from meshGenerators import suite
+
+partSample = 300
+
+def centroid(topology, f):
+    a, b, c = (topology.vertices[v] for v in topology.faces[f])
+    return [(a[k] + b[k] + c[k]) / 3.0 for k in range(3)]
+
+""" Return the mean centroid distance between consecutive faces, in mm. """
+def meanJump(topology, faces):
+    total = 0.0
+    previous = None
+    for f in faces:
+        c = centroid(topology, f)
+        if previous:
+            total += sum((c[k] - previous[k])**2 for k in range(3))**.5
+        previous = c
+    return total / max(len(faces) - 1, 1) * 10
+
+def benchOrdering(topology, name, params):
+    start = time.perf_counter()
+    order = faceOrder(topology, name)
+    ordered = time.perf_counter()
+    parts = list(pipeline.plan(pipeline.traverse(topology, order=order), topology.name))
+    for part in parts[:partSample]:
+        try:
+            partGen.partBytes(part.sides[0], part.sides[1], part.sides[2], params)
+        except ValueError:
+            pass
+    exported = time.perf_counter()
+    frames = transformTable(topology)
+    for part in parts:
+        frames.frame(part.face)
+    previewed = time.perf_counter()
+    spread = sum(max(s.index for s in part.sides) - min(s.index for s in part.sides) for part in parts)
+    return (ordered - start, exported - ordered, previewed - exported,
+            meanJump(topology, [part.face for part in parts]), spread / float(len(parts)))
+
+def main():
+    quick = "--quick" in sys.argv
+    print("%-12s %-7s %8s %8s %8s %9s %9s" % ("mesh", "order", "order s", "export s", "preview s", "jump mm", "spread"))
+    for topology in suite(quick):
+        params = partGen.partParams(3.0, digitsNeeded(topology.edgeCount()))
+        for name in orderings:
+            result = benchOrdering(topology, name, params)
+            print("%-12s %-7s %8.4f %8.4f %9.4f %9.1f %9.1f" % ((topology.name, name) + result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+""" Times synthesized part export from one process up to every core.
+
+    Run with plain python, no Fusion needed:
+        python benchmarks/benchParallel.py [grid size]
+    Exports every part of a synthetic grid into a temporary directory with
+    1, 2, 4... worker processes and prints the speed up over one process. """
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import meshTopology, digitsNeeded
+from parallelExport import exportParallel
+from partGen import partParams
+from benchTraversal import gridMesh
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    vertices, faces = gridMesh(n)
+    topology = meshTopology(vertices, faces, name="grid")
+    params = partParams(3.0, digitsNeeded(topology.edgeCount()))
+
+    counts = []
+    workers = 1
+    while workers < (os.cpu_count() or 1):
+        counts.append(workers)
+        workers *= 2
+    counts.append(os.cpu_count() or 1)
+
+    print("%8s %10s %10s %10s" % ("workers", "seconds", "parts/s", "speed up"))
+    base = None
+    for workers in counts:
+        saveDir = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            entries = exportParallel(topology, saveDir, params, workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(saveDir)
+        if base is None:
+            base = elapsed
+        print("%8i %10.3f %10.0f %10.2f" % (workers, elapsed, len(entries) / elapsed, base / elapsed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+""" Times the headless planning pipeline on a mesh file or a synthetic grid.
+
+    Run with plain python, no Fusion needed:
+        python benchmarks/benchPlanning.py [mesh.obj|mesh.stl] [minAltitude mm]
+    Without a file a synthetic grid is used. The mesh is wrapped in the fake
+    adsk stand-in and read back through fromBRep, the same adapter the add-in
+    uses, then planned (indices, hinges, convexity) and validated. """
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import meshTopology, planIter, sortSides, triangleFault
+from meshIO import fromBRep, loadMesh
+from fakeAdsk import fakeBody
+import batchPlan
+from benchTraversal import gridMesh
+
+def main():
+    minAlt = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    start = time.perf_counter()
+    if len(sys.argv) > 1:
+        topology = loadMesh(sys.argv[1])
+    else:
+        vertices, faces = gridMesh(100)
+        topology = meshTopology(vertices, faces, name="grid")
+    loaded = time.perf_counter()
+
+    body = fakeBody(topology)
+    wrapped = time.perf_counter()
+    topology = fromBRep(body)
+    adapted = time.perf_counter()
+
+    faults = {}
+    for sideTup, f in planIter(topology):
+        side1, side2, side3 = sortSides(sideTup)
+        fault = triangleFault(side1.length, side2.length, side3.length, minAlt)
+        if fault:
+            faults[fault] = faults.get(fault, 0) + 1
+    planned = time.perf_counter()
+
+    if batchPlan.available:
+        plan = batchPlan.planTopology(topology, minAlt)
+        batched = time.perf_counter()
+
+    print("faces:     %i" % topology.faceCount())
+    print("edges:     %i" % topology.edgeCount())
+    print("faults:    %r" % faults)
+    print("load:      %.4f s" % (loaded - start))
+    print("fake body: %.4f s" % (wrapped - loaded))
+    print("fromBRep:  %.4f s" % (adapted - wrapped))
+    print("plan:      %.4f s" % (planned - adapted))
+    if batchPlan.available:
+        print("batched:   %.4f s (%i short side, %i short altitude)" % (
+        batched - planned, plan.shortSide.sum(), plan.shortAltitude.sum()))
+    else:
+        print("batched:   NumPy not installed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+""" Times every headless stage over the synthetic meshes and keeps a baseline.
+
+    Run with plain python, no Fusion needed:
+        python benchmarks/benchSuite.py [--quick] [--out results.json] [--compare baseline.json]
+    For every mesh from meshGenerators it times
+        traverse  - the mesh wrapped in fakeAdsk, read back through fromBRep
+                    and walked with planIter, IE what meshIter does
+        plan      - pipeline.plan over pipeline.traverse
+        validate  - preflightCheck
+        bitLayout - every side's bit layout through a fresh bitLayoutTable
+        partGen   - partGen.partBytes for the first partSample parts, the
+                    synthesized export
+    Each stage is the best of a few repeats. Results are written as JSON, by
+    default to benchmarks/baseline.json. With --compare every stage is
+    checked against an earlier result instead (written to benchmarks/latest.json
+    so the baseline is kept) and the script exits with 1 if one got more than
+    tolerance times slower. """
+
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import planIter, bitLayoutTable, digitsNeeded
+from meshIO import fromBRep
+from fakeAdsk import fakeBody
+from preflight import preflightCheck
+import batchPlan
+import partGen
+import pipeline
+from meshGenerators import suite
+
+""" Stages more than this many times slower than the baseline are regressions. """
+tolerance = 1.5
+
+""" Stages under this many seconds are too noisy to compare. """
+minCompared = 0.02
+
+""" Parts synthesized per mesh, generation time is linear in the part count. """
+partSample = 500
+
+repeats = 3
+
+""" Return the best time of repeats calls of func and its last result. """
+def best(func):
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def traverse(topology):
+    body = fakeBody(topology)
+    for sides, f in planIter(fromBRep(body)):
+        pass
+
+def layouts(parts, digits):
+    table = bitLayoutTable(digits)
+    for part in parts:
+        for side in part.sides:
+            table.names(side.index, side.hinge, side.convex)
+
+""" Synthesize the parts, skipping faces too small for the hinges and bits
+    like partGen.generateParts does. """
+def generate(parts, params):
+    size = 0
+    for part in parts:
+        try:
+            size += len(partGen.partBytes(part.sides[0], part.sides[1], part.sides[2], params))
+        except ValueError:
+            pass
+    return size
+
+""" Time every stage on one mesh and return its results. """
+def benchMesh(topology, minAlt=10.0):
+    digits = digitsNeeded(topology.edgeCount())
+    params = partGen.partParams(3.0, digits, minAlt)
+    stages = {}
+    stages["traverse"], result = best(lambda: traverse(topology))
+    stages["plan"], parts = best(lambda: list(pipeline.plan(pipeline.traverse(topology), topology.name)))
+    stages["validate"], check = best(lambda: preflightCheck(topology, minAlt, digits))
+    stages["bitLayout"], result = best(lambda: layouts(parts, digits))
+    stages["partGen"], size = best(lambda: generate(parts[:partSample], params))
+    faces = topology.faceCount()
+    return {
+        "faces": faces,
+        "edges": topology.edgeCount(),
+        "faults": len(check.shortSide) + len(check.shortAltitude),
+        "openEdges": sum(1 for e in range(topology.edgeCount()) if topology.edgeOpen(e)),
+        "stages": stages,
+        "usPerFace": dict((name, t / faces * 1e6) for name, t in stages.items()),
+        "usPerPart": stages["partGen"] / min(faces, partSample) * 1e6,
+    }
+
+""" Return the (mesh, stage, baseline s, current s) of every regression. """
+def compare(baseline, results):
+    regressions = []
+    for mesh, current in results["meshes"].items():
+        old = baseline.get("meshes", {}).get(mesh)
+        if not old:
+            continue
+        for stage, t in current["stages"].items():
+            before = old["stages"].get(stage)
+            if before is not None and max(before, t) >= minCompared and t > before * tolerance:
+                regressions.append((mesh, stage, before, t))
+    return regressions
+
+def main():
+    args = sys.argv[1:]
+    quick = "--quick" in args
+    here = os.path.dirname(os.path.realpath(__file__))
+    out = os.path.join(here, "baseline.json")
+    baselinePath = None
+    if "--compare" in args:
+        baselinePath = args[args.index("--compare") + 1]
+        out = os.path.join(here, "latest.json")
+    if "--out" in args:
+        out = args[args.index("--out") + 1]
+
+    results = {
+        "python": platform.python_version(),
+        "numpy": batchPlan.available,
+        "quick": quick,
+        "meshes": {},
+    }
+    print("%-12s %7s %7s %s" % ("mesh", "faces", "faults", "  ".join("%9s" % s for s in
+        ("traverse", "plan", "validate", "bitLayout", "partGen"))))
+    for topology in suite(quick):
+        entry = benchMesh(topology)
+        results["meshes"][topology.name] = entry
+        print("%-12s %7i %7i %s" % (topology.name, entry["faces"], entry["faults"],
+            "  ".join("%9.4f" % t for t in entry["stages"].values())))
+
+    if baselinePath:
+        with open(baselinePath) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results)
+        for mesh, stage, before, t in regressions:
+            print("REGRESSION %s %s: %.4f s -> %.4f s" % (mesh, stage, before, t))
+        if not regressions:
+            print("No stage is more than %.1fx slower than %s" % (tolerance, baselinePath))
+    with open(out, "w") as f:
+        json.dump(results, f, indent=1)
+    print("Results written to " + out)
+    if baselinePath and regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
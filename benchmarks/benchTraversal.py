@@ -0,0 +1,74 @@
+""" Times edge registration over synthetic meshes of increasing size.
+
+    Run with plain python, no Fusion needed:
+        python benchmarks/benchTraversal.py
+    Walks every face of a triangulated grid the same way meshIter does and
+    prints the time per face. The registry should keep that number flat as the
+    face count grows, the old list lookup grows linearly with it. """
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import edgeRegistry, edgeKey, pointKey
+
+""" Return the vertices and faces of an n by n grid split into 2*n*n triangles. """
+def gridMesh(n):
+    vertices = []
+    for j in range(n + 1):
+        for i in range(n + 1):
+            vertices.append(pointKey(i * 2.5, j * 2.5, 0.0))
+    faces = []
+    for j in range(n):
+        for i in range(n):
+            a = j * (n + 1) + i
+            b = a + 1
+            c = a + n + 1
+            d = c + 1
+            faces.append((a, b, d))
+            faces.append((a, d, c))
+    return vertices, faces
+
+""" Visit every edge of every face using the edge registry. """
+def traverseRegistry(vertices, faces):
+    registry = edgeRegistry()
+    for face in faces:
+        for e in range(3):
+            key = edgeKey(vertices[face[e]], vertices[face[(e + 1) % 3]])
+            registry.visit(key)
+    return len(registry)
+
+""" Visit every edge of every face using the list lookup meshIter used to do. """
+def traverseList(vertices, faces):
+    visited = []
+    for face in faces:
+        for e in range(3):
+            key = edgeKey(vertices[face[e]], vertices[face[(e + 1) % 3]])
+            try:
+                visited.index(key)
+            except ValueError:
+                visited.append(key)
+    return len(visited)
+
+def timeIt(func, vertices, faces):
+    start = time.perf_counter()
+    func(vertices, faces)
+    return time.perf_counter() - start
+
+def main():
+    print("%8s %12s %14s %12s %14s" % ("faces", "registry s", "registry us/f", "list s", "list us/f"))
+    for n in (10, 20, 40, 80, 160):
+        vertices, faces = gridMesh(n)
+        fCount = len(faces)
+        reg = timeIt(traverseRegistry, vertices, faces)
+        # The list lookup is quadratic, skip it once it would take minutes
+        if fCount <= 15000:
+            lst = timeIt(traverseList, vertices, faces)
+            lstStr = "%12.4f %14.2f" % (lst, lst / fCount * 1e6)
+        else:
+            lstStr = "%12s %14s" % ("-", "-")
+        print("%8i %12.4f %14.2f %s" % (fCount, reg, reg / fCount * 1e6, lstStr))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+""" Synthetic meshes for the benchmark suite.
+
+    Each generator returns a meshTopology in cm, faces wound outward, sized so
+    a typical side is well over meshCore.minSide unless the generator is meant
+    to produce faults. Random generators take a seed so every run builds the
+    same mesh. """
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from meshCore import meshTopology
+
+""" Side length (cm) the generators aim for. """
+spacing = 2.5
+
+""" Return an icosphere subdivided level times, sides about spacing long. """
+def icosphere(level):
+    t = (1.0 + 5**.5) / 2.0
+    vertices = [(-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+                (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+                (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)]
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+             (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+             (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+             (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    vertices = [unit(v) for v in vertices]
+    for i in range(level):
+        midpoints = {}
+        def midpoint(a, b):
+            key = (min(a, b), max(a, b))
+            if key not in midpoints:
+                va, vb = vertices[a], vertices[b]
+                vertices.append(unit(((va[0] + vb[0]) / 2, (va[1] + vb[1]) / 2, (va[2] + vb[2]) / 2)))
+                midpoints[key] = len(vertices) - 1
+            return midpoints[key]
+        divided = []
+        for a, b, c in faces:
+            ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+            divided.extend([(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)])
+        faces = divided
+    # The unit icosahedron's sides are about 1.05 long, halved each level
+    radius = spacing * 2**level / 1.05
+    vertices = [(x * radius, y * radius, z * radius) for x, y, z in vertices]
+    return meshTopology(vertices, faces, name="icosphere%i" % level)
+
+def unit(v):
+    length = (v[0]**2 + v[1]**2 + v[2]**2)**.5
+    return (v[0] / length, v[1] / length, v[2] / length)
+
+""" Return the faces of a grid of (n + 1) by (n + 1) vertices, two triangles
+    per cell facing +Z, skipping the cells in holes. """
+def gridFaces(n, holes=()):
+    faces = []
+    for j in range(n):
+        for i in range(n):
+            if (i, j) in holes:
+                continue
+            a = j * (n + 1) + i
+            b = a + 1
+            c = a + n + 1
+            d = c + 1
+            faces.append((a, b, d))
+            faces.append((a, d, c))
+    return faces
+
+""" Return an n by n grid with random heights, amplitude cm at most. """
+def terrain(n, seed=1, amplitude=1.0):
+    rand = random.Random(seed)
+    vertices = [(i * spacing, j * spacing, rand.uniform(0, amplitude))
+                for j in range(n + 1) for i in range(n + 1)]
+    return meshTopology(vertices, gridFaces(n), name="terrain%i" % n)
+
+""" Return an open n by n terrain with holes random cells left out, IE with
+    open edges around every hole as well as the border. """
+def holedSurface(n, holes, seed=1):
+    rand = random.Random(seed)
+    cells = [(i, j) for j in range(1, n - 1) for i in range(1, n - 1)]
+    missing = set(rand.sample(cells, min(holes, len(cells))))
+    vertices = [(i * spacing, j * spacing, rand.uniform(0, 1.0))
+                for j in range(n + 1) for i in range(n + 1)]
+    return meshTopology(vertices, gridFaces(n, missing), name="holed%i" % n)
+
+""" Return an n by n grid where about fraction of the columns are squeezed to
+    1 mm, IE a mesh full of short side and short altitude faults. """
+def slivers(n, fraction=0.3, seed=1):
+    rand = random.Random(seed)
+    xs = [0.0]
+    for i in range(n):
+        xs.append(xs[-1] + (0.1 if rand.random() < fraction else spacing))
+    vertices = [(xs[i], j * spacing, 0.0) for j in range(n + 1) for i in range(n + 1)]
+    return meshTopology(vertices, gridFaces(n), name="slivers%i" % n)
+
+""" Return the benchmark suite's meshes, smaller ones when quick is set. """
+def suite(quick=False):
+    if quick:
+        return [icosphere(2), icosphere(3), terrain(20), holedSurface(20, 10), slivers(20)]
+    return [icosphere(2), icosphere(3), icosphere(4), icosphere(5),
+            terrain(40), terrain(80), holedSurface(60, 40), slivers(60)]
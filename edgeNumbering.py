@@ -0,0 +1,102 @@
+""" Numbers edges so parts need as few bit bodies as possible.
+
+    Every '1' in an edge's index costs a top and a bottom bit body on both of
+    the edge's parts and every padding slot a bottom bit body, so the combine
+    time depends on which index each edge gets. meshIter simply numbers edges
+    in the order it first visits them. edgeNumbering instead hands the
+    cheapest codes that fit in totalDigits to the edges, edges with two parts
+    first, keeping every code unique, and every code's bit pattern unique
+    (the centered layout can drop the last bit of an even length index, so
+    two indices can otherwise share a pattern). Hinges follow the visiting
+    order rather than the code, so any code can go to any edge.
+    Pass codes to planIter or pipeline.traverse to use the numbering, along
+    with the same face order the numbering was planned with.
+
+    Headless usage:
+        python edgeNumbering.py mesh.obj|mesh.stl [binaryDigits] """
+
+import sys
+
+from meshCore import planIter, digitMask, digitsNeeded
+
+""" Codes above 2**maxSearchDigits aren't considered, the search is
+    exhaustive up to there. """
+maxSearchDigits = 18
+
+""" Return the number of bit bodies the digit pattern of code needs. """
+def layoutCost(code, totalDigits):
+    return bin(digitMask(code, totalDigits)).count("1")
+
+""" Return the (cost, code) of every code below 2**totalDigits with a bit
+    pattern no lower code has, cheapest first. """
+def candidateCodes(totalDigits):
+    seen = set()
+    candidates = []
+    for code in range(2**min(totalDigits, maxSearchDigits)):
+        mask = digitMask(code, totalDigits)
+        if mask in seen:
+            continue
+        seen.add(mask)
+        candidates.append((bin(mask).count("1"), code))
+    candidates.sort()
+    return candidates
+
+class edgeNumbering:
+
+    def __init__(self, topology, totalDigits=None, order=None):
+        if totalDigits is None:
+            totalDigits = digitsNeeded(topology.edgeCount())
+        self.totalDigits = int(totalDigits)
+        # Sides per edge, by the index meshIter would give it
+        self.weights = []
+        for sides, f in planIter(topology, order=order):
+            for side in sides:
+                if side.index == len(self.weights):
+                    self.weights.append(0)
+                self.weights[side.index] += 1
+
+        self.codes = list(range(len(self.weights)))
+        self.optimized = False
+        candidates = candidateCodes(self.totalDigits)
+        if len(self.weights) > len(candidates):
+            # Not enough distinct patterns, keep the visiting order
+            return
+        # Most used edges get the cheapest codes, ties keep visiting order
+        edges = sorted(range(len(self.weights)), key=lambda n: -self.weights[n])
+        for n, (cost, code) in zip(edges, candidates):
+            self.codes[n] = code
+        self.optimized = True
+
+    """ Return the bit bodies every part of the mesh needs with the given codes. """
+    def bodies(self, codes):
+        return sum(w * layoutCost(code, self.totalDigits) for w, code in zip(self.weights, codes))
+
+    def naiveBodies(self):
+        return self.bodies(range(len(self.weights)))
+
+    def optimizedBodies(self):
+        return self.bodies(self.codes)
+
+    """ Return a line describing the bit bodies saved, and the combine time
+        saved if secondsPerBody is given. """
+    def report(self, secondsPerBody=None):
+        if not self.optimized:
+            return "Edge numbering: not enough %i digit patterns, kept the visiting order" % self.totalDigits
+        naive, optimized = self.naiveBodies(), self.optimizedBodies()
+        text = "Edge numbering: %i bit bodies instead of %i (%i saved, %.0f%%)" % (
+            optimized, naive, naive - optimized, 100.0 * (naive - optimized) / max(naive, 1))
+        if secondsPerBody:
+            text += ", about %.0f s of combining saved" % ((naive - optimized) * secondsPerBody)
+        return text
+
+def main():
+    from meshIO import loadMesh
+    if len(sys.argv) < 2:
+        print("usage: python edgeNumbering.py mesh.obj|mesh.stl [binaryDigits]")
+        return
+    topology = loadMesh(sys.argv[1])
+    digits = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print(edgeNumbering(topology, digits).report())
+
+if __name__ == "__main__":
+    main()
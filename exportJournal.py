@@ -0,0 +1,116 @@
+""" Records export progress so an interrupted run can pick up where it stopped.
+
+    The journal is a JSON lines file in the export directory. The first line
+    describes the run (mesh, template hash and a hash of the planned part
+    names), every following line records one finished part with the SHA-1 of
+    its file. Lines are appended and flushed as parts finish so a crash loses
+    at most the part being written.
+
+    On startup the journal is checked: if it was written for a different plan
+    it is discarded, and a part only counts as done when its file still exists
+    with the recorded hash. A half written last line is ignored. Nothing is
+    written, or discarded, until start is called, so a run can look at what
+    would be resumed and still back out. """
+
+import hashlib
+import json
+import os
+
+""" Return the SHA-1 of a file's contents. """
+def fileHash(path):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+""" Return a hash identifying a plan, IE the ordered part names and the
+    template they are made from. """
+def planHash(names, template=""):
+    sha = hashlib.sha1(template.encode("utf-8"))
+    for name in names:
+        sha.update(b"\0")
+        sha.update(name.encode("utf-8"))
+    return sha.hexdigest()
+
+class exportJournal:
+
+    def __init__(self, saveDir, meshName, names, template=""):
+        self.saveDir = saveDir
+        self.path = os.path.join(saveDir, meshName + "_journal.jsonl")
+        self.header = {
+            "mesh": meshName,
+            "template": template,
+            "plan": planHash(names, template),
+            "faces": len(names),
+        }
+        self.done = {}
+        # Problems found while checking the existing journal, for reporting
+        self.problems = []
+        self.resumable = self.load()
+        self.file = None
+
+    """ Open the journal for recording, starting it over unless it can be resumed. """
+    def start(self):
+        if self.resumable:
+            self.file = open(self.path, "a")
+        else:
+            self.file = open(self.path, "w")
+            self.write(self.header)
+
+    """ Read and check an existing journal. Return True if it can be resumed. """
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            self.problems.append("Unreadable journal header, starting over")
+            return False
+        if header.get("plan") != self.header["plan"]:
+            self.problems.append("Journal was written for a different mesh or template, starting over")
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                name, sha = entry["file"], entry["sha1"]
+            except (ValueError, KeyError, TypeError):
+                self.problems.append("Skipped a damaged journal line")
+                continue
+            path = os.path.join(self.saveDir, entry.get("stored", name))
+            if not os.path.exists(path):
+                self.problems.append("%s is missing and will be exported again" % name)
+            elif fileHash(path) != sha:
+                self.problems.append("%s doesn't match its hash and will be exported again" % name)
+            else:
+                self.done[name] = sha
+        return True
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    """ Return True if the named part was finished by an earlier run. """
+    def isDone(self, name):
+        return name in self.done
+
+    """ Record the named part as finished. stored is the file name the part
+        was saved under if it differs, IE when it was compressed. sha is the
+        file's SHA-1 if the caller already has it, otherwise the file is read
+        back and hashed. """
+    def record(self, name, stored=None, sha=None):
+        stored = stored or name
+        if sha is None:
+            sha = fileHash(os.path.join(self.saveDir, stored))
+        self.done[name] = sha
+        entry = {"file": name, "sha1": sha}
+        if stored != name:
+            entry["stored"] = stored
+        self.write(entry)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
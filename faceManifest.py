@@ -0,0 +1,108 @@
+""" Lets a re-export rebuild only the faces that changed.
+
+    Every export writes <mesh>_faces.json to the export directory, listing
+    each part's file and its face signature: the part signature (side
+    lengths, hinges, convexity, bit layouts, template and center body, see
+    partCache.partSignature) plus the edge indices. The next export into the
+    same directory diffs against it, a part whose signature is unchanged and
+    whose file is still there isn't rebuilt. Once a run has gone through
+    every face the files of parts that are no longer planned, or that this
+    run stores under another file name (IE compressed where they weren't),
+    are stale and are removed, an interrupted or partial run keeps the old
+    entries.
+
+    Unlike the export journal, which only resumes a run with exactly the same
+    plan, this survives edits to the mesh and template. """
+
+import hashlib
+import json
+import os
+
+from partCache import partSignature
+
+manifestVersion = 1
+
+""" Return the signature of a face's part given its three (sorted) sides. """
+def faceSignature(side1, side2, side3, totalDigits, template="", core=None):
+    text = repr((partSignature(side1, side2, side3, totalDigits, template, core),
+                 side1.index, side2.index, side3.index))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class faceManifest:
+
+    def __init__(self, saveDir, meshName):
+        self.saveDir = saveDir
+        self.path = os.path.join(saveDir, meshName + "_faces.json")
+        self.meshName = meshName
+        # file name: {"face", "signature", "stored"} from the last run and this one
+        self.previous = {}
+        self.current = {}
+        self.kept = 0
+        self.removed = 0
+        self.complete = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == manifestVersion:
+                self.previous = dict((entry["file"], entry) for entry in manifest["parts"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.previous = {}
+
+    """ Return True if the named part was exported with the same signature by
+        an earlier run and its file is still there. The part is carried over
+        into this run's manifest. """
+    def unchanged(self, name, signature):
+        entry = self.previous.get(name)
+        if not entry or entry["signature"] != signature:
+            return False
+        if not os.path.exists(os.path.join(self.saveDir, entry.get("stored", name))):
+            return False
+        self.current[name] = entry
+        self.kept += 1
+        return True
+
+    """ Record the named part of face f as exported. stored is the file name
+        it was saved under if it differs, IE when it was compressed. """
+    def record(self, f, name, signature, stored=None):
+        entry = {"face": f, "file": name, "signature": signature}
+        if stored and stored != name:
+            entry["stored"] = stored
+        self.current[name] = entry
+
+    """ Mark the run as having gone through every face and return the stale
+        files that are still there: the stored file names of parts no longer
+        planned or stored under a different name this run. names is every
+        planned part name, storedName(name) the file name this run stores a
+        part under. """
+    def finish(self, names, storedName=None):
+        self.complete = True
+        planned = set(names)
+        stale = []
+        for name, entry in self.previous.items():
+            stored = entry.get("stored", name)
+            if name not in planned or stored != (storedName(name) if storedName else name):
+                stale.append(stored)
+        stale = [stored for stored in stale if os.path.exists(os.path.join(self.saveDir, stored))]
+        self.removed = len(stale)
+        return stale
+
+    """ Write the manifest. After a partial run the last run's entries are
+        kept for the parts this run didn't reach. """
+    def save(self):
+        parts = {}
+        if not self.complete:
+            parts.update(self.previous)
+        parts.update(self.current)
+        manifest = {
+            "version": manifestVersion,
+            "mesh": self.meshName,
+            "parts": sorted(parts.values(), key=lambda entry: entry["face"]),
+        }
+        with open(self.path, "w") as f:
+            json.dump(manifest, f, indent=1)
+
+    def report(self):
+        return "%i unchanged parts kept, %i stale parts removed" % (self.kept, self.removed)
@@ -0,0 +1,137 @@
+""" Orders a mesh's faces so neighbouring parts are made together.
+
+    meshIter walks faces in the order the BRep lists them, which jumps
+    around the model. An ordering is a list of every face index computed up
+    front, planIter visits faces in that order so edges get numbered as they
+    are reached and neighbouring parts end up with close edge indices:
+        mesh   - the source order, IE no reordering
+        bfs    - breadth first over face adjacency, one component at a time
+        morton - along a Z-order (Morton) curve through the face centroids
+        strips - greedy strips, always stepping to the unvisited neighbour
+                 with the fewest unvisited neighbours
+    Morton uses NumPy when it's available. """
+
+from collections import deque
+
+import batchPlan
+
+np = batchPlan.np
+
+""" Bits per axis of the Morton code. """
+mortonBits = 10
+
+""" Return the faces sharing an edge with each face, as lists. """
+def faceNeighbours(topology):
+    neighbours = []
+    for f, edges in enumerate(topology.faceEdges):
+        found = []
+        for e in edges:
+            for other in topology.edgeFaces[e]:
+                if other != f and other not in found:
+                    found.append(other)
+        neighbours.append(found)
+    return neighbours
+
+def meshOrder(topology):
+    return list(range(topology.faceCount()))
+
+def bfsOrder(topology):
+    neighbours = faceNeighbours(topology)
+    seen = [False] * topology.faceCount()
+    order = []
+    for start in range(topology.faceCount()):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = deque([start])
+        while queue:
+            f = queue.popleft()
+            order.append(f)
+            for n in neighbours[f]:
+                if not seen[n]:
+                    seen[n] = True
+                    queue.append(n)
+    return order
+
+""" Return the bits of v spread out to every third bit. """
+def spreadBits(v):
+    rv = 0
+    for i in range(mortonBits):
+        rv |= ((v >> i) & 1) << (3 * i)
+    return rv
+
+def mortonOrder(topology):
+    faceCount = topology.faceCount()
+    if not faceCount:
+        return []
+    scale = (1 << mortonBits) - 1
+    if batchPlan.available:
+        vertices = np.asarray(topology.vertices, dtype=np.float64)
+        faces = np.asarray(topology.faces, dtype=np.int64).reshape(-1, 3)
+        centroids = vertices[faces].mean(axis=1)
+        low = centroids.min(axis=0)
+        # One scale for every axis so flat meshes aren't sorted by their noise
+        span = float((centroids.max(axis=0) - low).max()) or 1.0
+        cells = ((centroids - low) / span * scale).astype(np.int64)
+        codes = np.zeros(faceCount, dtype=np.int64)
+        for i in range(mortonBits):
+            for axis in range(3):
+                codes |= ((cells[:, axis] >> i) & 1) << (3 * i + axis)
+        return np.argsort(codes, kind="stable").tolist()
+    centroids = []
+    for face in topology.faces:
+        a, b, c = (topology.vertices[v] for v in face)
+        centroids.append([(a[k] + b[k] + c[k]) / 3.0 for k in range(3)])
+    low = [min(c[k] for c in centroids) for k in range(3)]
+    high = [max(c[k] for c in centroids) for k in range(3)]
+    span = max(high[k] - low[k] for k in range(3)) or 1.0
+    codes = []
+    for c in centroids:
+        cell = [int((c[k] - low[k]) / span * scale) for k in range(3)]
+        codes.append(spreadBits(cell[0]) | spreadBits(cell[1]) << 1 | spreadBits(cell[2]) << 2)
+    return sorted(range(faceCount), key=codes.__getitem__)
+
+def stripOrder(topology):
+    neighbours = faceNeighbours(topology)
+    faceCount = topology.faceCount()
+    free = [len(n) for n in neighbours]
+    seen = [False] * faceCount
+    order = []
+
+    def visit(f):
+        seen[f] = True
+        order.append(f)
+        for n in neighbours[f]:
+            free[n] -= 1
+
+    # Strips start on faces with few free neighbours, IE at borders and ends
+    starts = sorted(range(faceCount), key=free.__getitem__)
+    for start in starts:
+        if seen[start]:
+            continue
+        f = start
+        visit(f)
+        while True:
+            candidates = [n for n in neighbours[f] if not seen[n]]
+            if not candidates:
+                break
+            f = min(candidates, key=free.__getitem__)
+            visit(f)
+    return order
+
+""" The orderings by name, in the order the add-in lists them. """
+orderings = {
+    "mesh": meshOrder,
+    "bfs": bfsOrder,
+    "morton": mortonOrder,
+    "strips": stripOrder,
+}
+
+""" Return the named ordering of a meshTopology's faces, None for "mesh"
+    which needs no reordering. """
+def faceOrder(topology, name):
+    if name == "mesh":
+        return None
+    if name not in orderings:
+        raise ValueError("Unknown face order %r, expected one of %s" % (name, ", ".join(orderings)))
+    return orderings[name](topology)
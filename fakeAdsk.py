@@ -0,0 +1,196 @@
+""" A headless stand-in for the parts of the Fusion BRep API Mesh Maker reads.
+
+    fakeBody(topology) wraps a meshCore.meshTopology in objects shaped like
+    adsk.fusion.BRepBody and friends so code written against the Fusion API,
+    IE meshIO.fromBRep, can be run, timed and debugged outside Fusion 360.
+    Only the members Mesh Maker actually touches are provided. """
+
+import math
+
+""" Stand-in for the ObjectCollection style containers (BRepFaces, BRepEdges...). """
+class fakeCollection:
+    def __init__(self, items):
+        self.items = items
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    def item(self, i):
+        return self.items[i]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+""" Stand-in for adsk.core.Vector3D. """
+class fakeVector:
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+    @property
+    def length(self):
+        return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+    def dotProduct(self, other):
+        return self.x*other.x + self.y*other.y + self.z*other.z
+
+    def crossProduct(self, other):
+        return fakeVector(self.y*other.z - self.z*other.y,
+                          self.z*other.x - self.x*other.z,
+                          self.x*other.y - self.y*other.x)
+
+    def angleTo(self, other):
+        lengths = self.length * other.length
+        if lengths == 0:
+            return 0.0
+        return math.acos(max(-1.0, min(1.0, self.dotProduct(other) / lengths)))
+
+    def scaleBy(self, scale):
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return True
+
+""" Stand-in for adsk.core.Point3D. """
+class fakePoint:
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+    def vectorTo(self, other):
+        return fakeVector(other.x - self.x, other.y - self.y, other.z - self.z)
+
+    def distanceTo(self, other):
+        return self.vectorTo(other).length
+
+    def isEqualTo(self, other):
+        return self.x == other.x and self.y == other.y and self.z == other.z
+
+class fakeVertex:
+    def __init__(self, x, y, z):
+        self.geometry = fakePoint(x, y, z)
+
+class fakeLoop:
+    def __init__(self, face):
+        self.face = face
+
+class fakeCoEdge:
+    def __init__(self, loop, isOpposedToEdge):
+        self.loop = loop
+        self.isOpposedToEdge = isOpposedToEdge
+
+class fakeEdge:
+    def __init__(self, startVertex, endVertex):
+        self.startVertex = startVertex
+        self.endVertex = endVertex
+        self.faces = fakeCollection([])
+        self.coEdges = fakeCollection([])
+
+    @property
+    def length(self):
+        return self.startVertex.geometry.distanceTo(self.endVertex.geometry)
+
+class fakeEvaluator:
+    def __init__(self, normal):
+        self.normal = normal
+
+    def getNormalAtPoint(self, point):
+        return True, fakeVector(self.normal.x, self.normal.y, self.normal.z)
+
+class fakeFace:
+    def __init__(self, vertices, normal, body):
+        self.vertices = fakeCollection(vertices)
+        self.edges = fakeCollection([])
+        self.loops = fakeCollection([fakeLoop(self)])
+        self.evaluator = fakeEvaluator(normal)
+        self.body = body
+        self.appearance = None
+        points = [v.geometry for v in vertices]
+        self.pointOnFace = fakePoint(sum(p.x for p in points) / 3.0,
+                                     sum(p.y for p in points) / 3.0,
+                                     sum(p.z for p in points) / 3.0)
+
+class fakeComponent:
+    def __init__(self, name):
+        self.name = name
+
+""" Stand-in for adsk.fusion.BRepBody built from a meshTopology. """
+class fakeBody:
+    def __init__(self, topology):
+        self.name = topology.name
+        self.parentComponent = fakeComponent(topology.name)
+        vertices = [fakeVertex(*p) for p in topology.vertices]
+        edges = [fakeEdge(vertices[v0], vertices[v1]) for v0, v1 in topology.edges]
+        faces = []
+        for f, face in enumerate(topology.faces):
+            n = topology.faceNormal(f)
+            length = math.sqrt(n[0]**2 + n[1]**2 + n[2]**2) or 1.0
+            fake = fakeFace([vertices[v] for v in face], fakeVector(n[0]/length, n[1]/length, n[2]/length), self)
+            for k, e in enumerate(topology.faceEdges[f]):
+                edge = edges[e]
+                fake.edges.items.append(edge)
+                edge.faces.items.append(fake)
+                # Faces walk their corners in order, edges run low index to high
+                edge.coEdges.items.append(fakeCoEdge(fake.loops.item(0), face[k] > face[(k + 1) % 3]))
+            faces.append(fake)
+        self.vertices = fakeCollection(vertices)
+        self.edges = fakeCollection(edges)
+        self.faces = fakeCollection(faces)
+
+""" Counts API calls made through counted proxies. """
+class apiCounter:
+    def __init__(self):
+        self.calls = 0
+
+plainTypes = (int, float, str, bool, bytes, type(None))
+
+""" Wrap a value handed out by the API so its use is counted too. """
+def wrapValue(value, counter):
+    if isinstance(value, plainTypes):
+        return value
+    if isinstance(value, tuple):
+        return tuple(wrapValue(v, counter) for v in value)
+    if callable(value) and not isinstance(value, type):
+        def call(*args, **kwargs):
+            counter.calls += 1
+            args = [a.target if isinstance(a, counted) else a for a in args]
+            return wrapValue(value(*args, **kwargs), counter)
+        return call
+    return counted(value, counter)
+
+""" Proxy around a fake API object that counts every property read, property
+    write and method call, each of which is a round trip into Fusion when the
+    real API is used. Wrap a fakeBody with it to count what code costs. """
+class counted:
+
+    def __init__(self, target, counter):
+        object.__setattr__(self, "target", target)
+        object.__setattr__(self, "counter", counter)
+
+    def __getattr__(self, name):
+        value = getattr(self.target, name)
+        if not callable(value):
+            self.counter.calls += 1
+        return wrapValue(value, self.counter)
+
+    def __setattr__(self, name, value):
+        self.counter.calls += 1
+        setattr(self.target, name, value)
+
+    def __iter__(self):
+        self.counter.calls += 1
+        for item in self.target:
+            yield wrapValue(item, self.counter)
+
+    def __eq__(self, other):
+        if isinstance(other, counted):
+            other = other.target
+        return self.target is other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return id(self.target)
@@ -0,0 +1,128 @@
+""" Writes finished parts to disk on a background thread.
+
+    The export loop hands finished part bytes (or files Fusion wrote to a
+    local temp directory) to a backgroundWriter and moves on, the writer
+    thread puts them in place. This keeps disk and network share latency out
+    of the per triangle time. The queue is bounded so a slow disk throttles
+    the export instead of piling up parts in memory, and files are fsynced in
+    batches rather than one at a time. With compress set parts are gzipped
+    and get a ".gz" suffix.
+
+    Given a partArchive the parts are streamed into it instead, named by
+    their file names, and compress is left to the archive. info (face,
+    sides...) goes into the archive's manifest, loose files ignore it.
+
+    onDone callbacks run on the writer thread once a file is in place. Errors
+    don't stop the writer, they're collected in errors. """
+
+import gzip
+import os
+import threading
+from queue import Queue
+
+endOfQueue = object()
+
+class backgroundWriter:
+
+    def __init__(self, maxQueue=32, fsyncEvery=64, compress=False, archive=None):
+        self.compress = compress and not archive
+        self.archive = archive
+        self.fsyncEvery = fsyncEvery
+        self.queue = Queue(maxQueue)
+        self.unsynced = []
+        self.errors = []
+        self.written = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    """ Return the path a part handed over as path ends up at. """
+    def finalPath(self, path):
+        if self.compress:
+            return path + ".gz"
+        return path
+
+    """ Write data to finalPath(path). """
+    def write(self, path, data, onDone=None, info=None):
+        self.queue.put(("write", data, self.finalPath(path), onDone, info))
+
+    """ Move the file at source to finalPath(path), compressing if enabled. """
+    def move(self, source, path, onDone=None, info=None):
+        self.queue.put(("move", source, self.finalPath(path), onDone, info))
+
+    """ Copy the file at source to path byte for byte. """
+    def copy(self, source, path, onDone=None, info=None):
+        self.queue.put(("copy", source, path, onDone, info))
+
+    def remove(self, path):
+        self.queue.put(("remove", None, path, None, None))
+
+    def run(self):
+        while True:
+            op = self.queue.get()
+            if op is endOfQueue:
+                break
+            kind, source, path, onDone, info = op
+            try:
+                if kind == "remove":
+                    os.remove(path)
+                    continue
+                if self.archive:
+                    self.toArchive(kind, source, path, onDone, info)
+                    continue
+                if kind == "write":
+                    data = source
+                else:
+                    with open(source, "rb") as f:
+                        data = f.read()
+                if self.compress and kind != "copy":
+                    data = gzip.compress(data)
+                f = open(path, "wb")
+                f.write(data)
+                self.unsynced.append(f)
+                if kind == "move":
+                    os.remove(source)
+                self.written += 1
+                # Hand the data to the OS so the file reads back complete, the
+                # fsync to the disk is what gets batched
+                f.flush()
+                if onDone:
+                    onDone(path)
+                if len(self.unsynced) >= self.fsyncEvery:
+                    self.sync()
+            except Exception as e:
+                self.errors.append("%s: %s" % (path, e))
+
+    def toArchive(self, kind, source, path, onDone, info):
+        name = os.path.basename(path)
+        if kind == "write":
+            self.archive.add(name, source, info)
+        else:
+            self.archive.addFile(name, source, info)
+            if kind == "move":
+                os.remove(source)
+        self.written += 1
+        if onDone:
+            onDone(path)
+
+    """ Flush, fsync and close every file written since the last sync. """
+    def sync(self):
+        for f in self.unsynced:
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+            except Exception as e:
+                self.errors.append("%s: %s" % (f.name, e))
+        self.unsynced = []
+
+    """ Wait for everything queued to be written, then sync. Return the errors. """
+    def close(self):
+        self.queue.put(endOfQueue)
+        self.thread.join()
+        self.sync()
+        if self.archive:
+            try:
+                self.archive.close()
+            except Exception as e:
+                self.errors.append("%s: %s" % (self.archive.path, e))
+        return self.errors
@@ -0,0 +1,378 @@
+""" Fusion independent mesh bookkeeping shared by Mesh Maker and its tools.
+
+    Nothing in this module may import adsk. It is imported by the add-in and by
+    the headless benchmarks alike. """
+
+from array import array
+
+""" Represents the different types of hinges. An openEdge hinge is used on
+    an edge in an open surface with no adjacent triangle on the given side.
+    IE, a side with no hinge at all. """
+class hingeType:
+    male = "male"
+    female = "female"
+    openEdge = "openEdge"
+
+""" A basic class describing the side of a triangle. """
+class Side:
+    def __init__(self, index, length, hinge, convex):
+        self.index = index
+        self.length = length
+        self.hinge = hinge
+        self.convex = convex
+
+""" Number of decimal places (in cm) vertex coordinates are rounded to when
+    building a vertex key. Fusion reports vertex positions to roughly 1e-10 cm,
+    rounding absorbs the noise without merging real vertices. """
+keyPrecision = 6
+
+""" Return a hashable key for a point given its coordinates. """
+def pointKey(x, y, z):
+    return (round(x, keyPrecision), round(y, keyPrecision), round(z, keyPrecision))
+
+""" Return the canonical key of the edge between two vertex keys. The key does
+    not depend on the direction the edge is walked in. """
+def edgeKey(v0, v1):
+    if v1 < v0:
+        return (v1, v0)
+    return (v0, v1)
+
+""" Assigns every edge a stable index the first time it is visited and derives
+    the edge's hinge from the visiting order. The face that visits an edge
+    first gets a male hinge on even visits, the second face gets the matching
+    female hinge.
+    Lookups are dictionary backed so a traversal is linear in the face count.
+    codes optionally renumbers the edges, the edge visited nth gets index
+    codes[n] instead of n. The hinge still follows the visiting order n, so
+    codes of either parity keep the hinges, see edgeNumbering. """
+class edgeRegistry:
+
+    def __init__(self, codes=None):
+        # (visiting order, index) by edge key
+        self.indices = {}
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __contains__(self, key):
+        return key in self.indices
+
+    """ Return the index and hinge of the edge with the given key, registering
+        the edge if this is its first visit. isOpen is only consulted on the
+        first visit. """
+    def visit(self, key, isOpen=False):
+        visited = self.indices.get(key)
+        if visited is not None:
+            n, edgeNum = visited
+            if n % 2 == 0:
+                return edgeNum, hingeType.female
+            return edgeNum, hingeType.male
+
+        n = edgeNum = len(self.indices)
+        if self.codes is not None:
+            edgeNum = self.codes[n]
+        self.indices[key] = (n, edgeNum)
+        if isOpen:
+            return edgeNum, hingeType.openEdge
+        if n % 2 == 0:
+            return edgeNum, hingeType.male
+        return edgeNum, hingeType.female
+
+""" Side lengths (mm) shorter than this cannot fit a hinge. """
+minSide = 20
+
+""" Basic vector math on (x, y, z) tuples. """
+def vSub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def vDot(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+def vCross(a, b):
+    return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+
+def vLength(a):
+    return vDot(a, a) ** .5
+
+""" A triangle mesh stored as plain arrays. Vertex positions are in cm to match
+    Fusion's internal units and faces are vertex index triples wound so their
+    normals point out of the body. Adjacency is built once on construction:
+        edges[e]      - the (low, high) vertex indices of edge e
+        edgeFaces[e]  - the faces bordering edge e, in face order
+        faceEdges[f]  - the edges of face f, faceEdges[f][k] runs from vertex
+                        k to vertex k + 1 of the face
+    faceRefs optionally holds the object each face came from (IE a BRepFace)
+    and badFaces the source faces that were skipped for not being triangles. """
+class meshTopology:
+
+    def __init__(self, vertices, faces, faceRefs=None, badFaces=None, name="mesh"):
+        self.vertices = vertices
+        self.faces = faces
+        self.faceRefs = faceRefs
+        self.badFaces = badFaces if badFaces is not None else []
+        self.name = name
+
+        self.edges = []
+        self.edgeFaces = []
+        self.faceEdges = []
+        lookup = {}
+        for f, face in enumerate(faces):
+            fEdges = []
+            for k in range(3):
+                key = edgeKey(face[k], face[(k + 1) % 3])
+                e = lookup.get(key)
+                if e is None:
+                    e = len(self.edges)
+                    lookup[key] = e
+                    self.edges.append(key)
+                    self.edgeFaces.append([])
+                self.edgeFaces[e].append(f)
+                fEdges.append(e)
+            self.faceEdges.append(fEdges)
+        self.table = None
+
+    """ Return the topology's edgeTable, building it on first use. """
+    def edgeTable(self):
+        if self.table is None:
+            self.table = edgeTable(self)
+        return self.table
+
+    def faceCount(self):
+        return len(self.faces)
+
+    def edgeCount(self):
+        return len(self.edges)
+
+    """ Return the edges shared by more than two faces, IE non-manifold edges. """
+    def nonManifoldEdges(self):
+        return [e for e in range(len(self.edges)) if len(self.edgeFaces[e]) > 2]
+
+    """ Return the unnormalized normal of face f. """
+    def faceNormal(self, f):
+        a, b, c = (self.vertices[v] for v in self.faces[f])
+        return vCross(vSub(b, a), vSub(c, a))
+
+    """ Return the length of edge e in mm. """
+    def edgeLength(self, e):
+        v0, v1 = self.edges[e]
+        return vLength(vSub(self.vertices[v1], self.vertices[v0])) * 10
+
+    """ Return True if edge e borders only a single face. IE it borders a hole
+        in the mesh and should not be given a hinge. """
+    def edgeOpen(self, e):
+        return len(self.edgeFaces[e]) == 1
+
+    """ Return True if edge e is a convex hinge. The edge is convex when the far
+        vertex of the second face sits behind the plane of the first. """
+    def edgeConvex(self, e):
+        if len(self.edgeFaces[e]) != 2:
+            return False
+        f0, f1 = self.edgeFaces[e]
+        v0, v1 = self.edges[e]
+        for far in self.faces[f1]:
+            if far != v0 and far != v1:
+                break
+        normal = self.faceNormal(f0)
+        offset = vSub(self.vertices[far], self.vertices[v0])
+        # Scale the tolerance with the triangle so coplanar faces read as flat
+        return vDot(normal, offset) < -1e-9 * vLength(normal) * vLength(offset)
+
+""" Length, openness and convexity of every edge of a meshTopology, computed
+    once per unique edge rather than once per face side. Lengths (mm) live in
+    an array('d') and the flags are packed into an array('B'). """
+class edgeTable:
+
+    openFlag = 1
+    convexFlag = 2
+
+    def __init__(self, topology):
+        count = topology.edgeCount()
+        self.lengths = array('d', (topology.edgeLength(e) for e in range(count)))
+        self.flags = array('B', bytes(count))
+        for e in range(count):
+            if topology.edgeOpen(e):
+                self.flags[e] = edgeTable.openFlag
+            elif topology.edgeConvex(e):
+                self.flags[e] = edgeTable.convexFlag
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def length(self, e):
+        return self.lengths[e]
+
+    def isOpen(self, e):
+        return bool(self.flags[e] & edgeTable.openFlag)
+
+    def isConvex(self, e):
+        return bool(self.flags[e] & edgeTable.convexFlag)
+
+""" Return the smallest altitude of a triangle given its three side lengths,
+    where s1 is the largest. """
+def triangleAltitude(s1, s2, s3):
+    # Scary formula for calculating the smallest altitude of a triangle give three sides, where s1 is largest
+    square = 2*(s1**2)*(s2**2) + 2*(s2**2)*(s3**2) + 2*(s1**2)*(s3**2) - s3**4 - s2**4 - s1**4
+    # Degenerate triangles can dip just below zero from rounding
+    return max(square, 0.0)**.5 / (2*s1)
+
+""" Return "shortSide" or "shortAltitude" if a triangle with the given sides
+    (s1 largest, mm) can't be printed, None if it can. """
+def triangleFault(s1, s2, s3, minAlt):
+    if s2 < minSide or s3 < minSide:
+        return "shortSide"
+    if triangleAltitude(s1, s2, s3) < minAlt:
+        return "shortAltitude"
+    return None
+
+""" Return the given three sides reordered so that the longest comes first,
+    keeping their cyclic order. Assigning the largest length to side one
+    improves reliability and solves a vertical s2/s3 glitch. """
+def sortSides(sides):
+    if sides[1].length > sides[0].length and sides[1].length > sides[2].length:
+        return sides[1], sides[2], sides[0]
+    elif sides[2].length > sides[0].length and sides[2].length > sides[1].length:
+        return sides[2], sides[0], sides[1]
+    return sides[0], sides[1], sides[2]
+
+""" Return the number of binary digits needed to give each edge a unique index. """
+def digitsNeeded(edgeCount):
+    exp = 1
+    while (2**exp < edgeCount):
+        exp += 1
+    return exp
+
+""" The concavity marker bodies, in bitmask order after the digit bits. """
+markerNames = ("lConcaveb", "lConcavet", "rConcaveb", "rConcavet")
+
+""" Return the bit body names in bitmask order: bottom bits 1 to totalDigits,
+    top bits 1 to totalDigits, then the concavity markers. Bit k of a layout
+    mask stands for layoutNames(totalDigits)[k]. """
+def layoutNames(totalDigits):
+    return tuple(["%rb" % i for i in range(1, totalDigits + 1)] +
+                 ["%rt" % i for i in range(1, totalDigits + 1)] + list(markerNames))
+
+""" Return the digit bits of an edge index as a layout mask for a male side.
+    The index is written most significant bit first, centered in the
+    totalDigits slots, and the unused slots on either side get bottom bits. """
+def digitMask(index, totalDigits):
+    digits = index.bit_length()
+    offset = (totalDigits - digits) // 2
+    if digits % 2 == 1:
+        first = offset
+    else:
+        first = offset + 1
+    bottom = top = 0
+    for i in range(totalDigits):
+        strIndex = i - first
+        if i < offset or i >= totalDigits - offset:
+            bottom |= 1 << i
+        elif 0 <= strIndex < digits and (index >> (digits - 1 - strIndex)) & 1:
+            bottom |= 1 << i
+            top |= 1 << i
+    return bottom | (top << totalDigits)
+
+""" Bit layouts computed once and shared. The digit pattern of an edge index
+    is cached once for both of the edge's sides, a female side is the male
+    pattern mirrored, and the concavity markers only depend on the hinge and
+    convexity. Layouts are kept as bitmasks over layoutNames, the names for a
+    (index, hinge, convex) are resolved on first use. """
+class bitLayoutTable:
+
+    def __init__(self, totalDigits):
+        self.totalDigits = int(totalDigits)
+        self.bitNames = layoutNames(self.totalDigits)
+        self.digitMasks = {}
+        self.layouts = {}
+        d = self.totalDigits
+        self.half = (1 << d) - 1
+        # Marker bits by (female, convex)
+        lb, lt, rb, rt = (1 << (2*d + k) for k in range(4))
+        self.markers = {
+            (True, False): lb, (True, True): lb | rt | rb,
+            (False, False): rb, (False, True): rb | lt | lb,
+        }
+
+    """ Return the layout mask of a side. """
+    def mask(self, index, hinge, convex):
+        return self.layout(index, hinge, convex)[0]
+
+    """ Return the names of the bit bodies of a side as a tuple. """
+    def names(self, index, hinge, convex):
+        return self.layout(index, hinge, convex)[1]
+
+    def layout(self, index, hinge, convex):
+        key = (index, hinge, bool(convex))
+        layout = self.layouts.get(key)
+        if layout is None:
+            digits = self.digitMasks.get(index)
+            if digits is None:
+                digits = self.digitMasks[index] = digitMask(index, self.totalDigits)
+            female = hinge == hingeType.female
+            if female:
+                digits = self.mirror(digits)
+            mask = digits | self.markers[(female, bool(convex))]
+            layout = self.layouts[key] = (mask, tuple(self.bitNames[k] for k in range(len(self.bitNames)) if mask >> k & 1))
+        return layout
+
+    """ Return a digit mask with each half's slots in reverse order. """
+    def mirror(self, digits):
+        d = self.totalDigits
+        bottom = int(format(digits & self.half, "0%ib" % d)[::-1], 2) if d else 0
+        top = int(format(digits >> d, "0%ib" % d)[::-1], 2) if d else 0
+        return bottom | (top << d)
+
+""" Shared bitLayoutTables by digit count. """
+layoutTables = {}
+
+""" Return the shared bitLayoutTable for totalDigits. """
+def layoutTable(totalDigits):
+    totalDigits = int(totalDigits)
+    table = layoutTables.get(totalDigits)
+    if table is None:
+        table = layoutTables[totalDigits] = bitLayoutTable(totalDigits)
+    return table
+
+""" Given a single side, return the names of the bit bodies necessary to create
+    its binary bit pattern and its proper concavity indicator. """
+def bitLayout(index, hinge, convex, totalDigits):
+    return list(layoutTable(totalDigits).names(index, hinge, convex))
+
+""" Iterates through a meshTopology, returning a list of three Side objects
+    and the face index for each face. Edge indices and hinges are assigned in
+    visiting order exactly as meshIter does for a BRep body, renumbered by
+    codes if given (see edgeRegistry). order optionally lists the faces in the
+    order they are visited, see faceOrder. """
+class planIter:
+
+    def __init__(self, topology, codes=None, order=None):
+        self.topology = topology
+        self.order = order
+        self.f = 0
+        self.registry = edgeRegistry(codes)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        topology = self.topology
+        if self.f >= topology.faceCount():
+            raise StopIteration()
+        table = topology.edgeTable()
+        f = self.f
+        if self.order is not None:
+            f = self.order[f]
+        rv = []
+        for e in topology.faceEdges[f]:
+            edgeNum, hinge = self.registry.visit(e, table.isOpen(e))
+            rv.append(Side(edgeNum, table.lengths[e], hinge, table.isConvex(e)))
+        self.f += 1
+        return rv, f
+
+    next = __next__
+
+""" Return the file name (without extension) of the part for the given sides. """
+def partName(meshName, side1, side2, side3):
+    return "%s_%i_%i_%i__%.3f_%.3f_%.3f" % (
+        meshName, side1.index, side2.index, side3.index,
+        side1.length, side2.length, side3.length)
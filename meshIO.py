@@ -0,0 +1,277 @@
+""" Builds meshTopology objects from Fusion bodies and mesh files.
+
+    Every loader returns a meshCore.meshTopology, except loadArrays which
+    returns NumPy arrays for batchPlan. Files are assumed to be in mm and are
+    converted to cm, Fusion's internal unit, so that lengths agree with what
+    the add-in measures on a BRep body. """
+
+import os
+import struct
+from array import array
+
+from meshCore import meshTopology, pointKey, keyPrecision, vCross, vDot, vSub
+import batchPlan
+
+np = batchPlan.np
+
+""" Collapses coincident vertices onto a single index while a mesh is loaded. """
+class vertexWelder:
+
+    def __init__(self):
+        self.vertices = []
+        self.lookup = {}
+
+    def add(self, x, y, z):
+        key = pointKey(x, y, z)
+        v = self.lookup.get(key)
+        if v is None:
+            v = len(self.vertices)
+            self.lookup[key] = v
+            self.vertices.append((x, y, z))
+        return v
+
+""" Return a face built from three welded vertices, or None if the triangle
+    collapsed onto an edge or point during welding. """
+def weldedFace(a, b, c):
+    if a == b or b == c or a == c:
+        return None
+    return (a, b, c)
+
+""" Load a Wavefront OBJ file. Polygons with more than three corners are kept
+    out of the mesh and listed in badFaces by their 1 based face number. """
+def loadObj(path, scale=0.1):
+    welder = vertexWelder()
+    positions = []
+    faces = []
+    badFaces = []
+    faceNum = 0
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                positions.append((float(parts[1]) * scale, float(parts[2]) * scale, float(parts[3]) * scale))
+            elif parts[0] == "f":
+                faceNum += 1
+                corners = []
+                for part in parts[1:]:
+                    i = int(part.split("/")[0])
+                    # Negative indices count back from the latest vertex
+                    corners.append(positions[i - 1 if i > 0 else i])
+                if len(corners) != 3:
+                    badFaces.append(faceNum)
+                    continue
+                face = weldedFace(*(welder.add(*p) for p in corners))
+                if face:
+                    faces.append(face)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return meshTopology(welder.vertices, faces, badFaces=badFaces, name=name)
+
+""" Load an ASCII or binary STL file. """
+def loadStl(path, scale=0.1):
+    welder = vertexWelder()
+    faces = []
+    with open(path, "rb") as f:
+        data = f.read()
+    if isBinaryStl(data):
+        count = struct.unpack_from("<I", data, 80)[0]
+        for i in range(count):
+            # Skip the 12 byte facet normal, the winding is authoritative
+            xyz = struct.unpack_from("<9f", data, 84 + 50*i + 12)
+            face = weldedFace(*(welder.add(xyz[k] * scale, xyz[k+1] * scale, xyz[k+2] * scale) for k in (0, 3, 6)))
+            if face:
+                faces.append(face)
+    else:
+        corners = []
+        for line in data.decode("ascii", "replace").splitlines():
+            parts = line.split()
+            if parts and parts[0] == "vertex":
+                corners.append(welder.add(float(parts[1]) * scale, float(parts[2]) * scale, float(parts[3]) * scale))
+                if len(corners) == 3:
+                    face = weldedFace(*corners)
+                    if face:
+                        faces.append(face)
+                    corners = []
+    name = os.path.splitext(os.path.basename(path))[0]
+    return meshTopology(welder.vertices, faces, name=name)
+
+""" Return True if the STL data is binary. ASCII files start with "solid" but
+    so do some binary exporters' headers, the size check settles it. """
+def isBinaryStl(data):
+    if len(data) < 84:
+        return False
+    count = struct.unpack_from("<I", data, 80)[0]
+    return len(data) == 84 + 50*count or not data[:5].lower() == b"solid"
+
+""" Load a mesh file, picking the loader from the file's extension. """
+def loadMesh(path, scale=0.1):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".obj":
+        return loadObj(path, scale)
+    if ext == ".stl":
+        return loadStl(path, scale)
+    raise ValueError("Unsupported mesh file '%s'" % path)
+
+""" Facets read per chunk while welding, bounds the temporary arrays. """
+weldChunk = 1 << 16
+
+""" Return the corners of a binary STL as an (F, 9) float32 array memory
+    mapped from the file, in file units. The array is a strided view of the
+    facet records, nothing is read until it is indexed. """
+def mappedStlCorners(path):
+    with open(path, "rb") as f:
+        header = f.read(84)
+    count = struct.unpack_from("<I", header, 80)[0]
+    facet = np.dtype([("normal", "<f4", (3,)), ("corners", "<f4", (9,)), ("attribute", "<u2")])
+    if not count:
+        return np.zeros((0, 9), dtype=np.float32)
+    facets = np.memmap(path, dtype=facet, mode="r", offset=84, shape=(count,))
+    return facets["corners"]
+
+""" Stream an ASCII STL into an (F, 9) array of corners in file units. """
+def streamedStlCorners(path):
+    coords = array("d")
+    with open(path, "rb") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] == b"vertex":
+                coords.extend((float(parts[1]), float(parts[2]), float(parts[3])))
+    return np.frombuffer(coords, dtype=np.float64).reshape(-1, 9)
+
+""" Stream an OBJ into an (F, 9) array of triangle corners in file units.
+    Return the corners and the number of faces that weren't triangles. """
+def streamedObjCorners(path):
+    positions = array("d")
+    indices = array("q")
+    badFaces = 0
+    with open(path) as f:
+        for line in f:
+            if line.startswith("v "):
+                parts = line.split()
+                positions.extend((float(parts[1]), float(parts[2]), float(parts[3])))
+            elif line.startswith("f "):
+                parts = line.split()
+                if len(parts) != 4:
+                    badFaces += 1
+                    continue
+                count = len(positions) // 3
+                for part in parts[1:]:
+                    i = int(part.split("/")[0])
+                    # Negative indices count back from the latest vertex
+                    indices.append(i - 1 if i > 0 else count + i)
+    positions = np.frombuffer(positions, dtype=np.float64).reshape(-1, 3)
+    return positions[np.frombuffer(indices, dtype=np.int64)].reshape(-1, 9), badFaces
+
+""" A grid cell as one opaque 24 byte record. Records sort bytewise, which
+    isn't numeric order but is all weldCorners needs to find equal cells. """
+cellType = np.dtype("V24") if np else None
+
+""" Weld an (F, 9) array of triangle corners in file units, weldChunk facets
+    at a time. Corners are snapped to a grid of keyPrecision cm cells, the
+    same rounding pointKey does, and corners in the same cell share a vertex,
+    numbered and placed by its first corner in file order. Only the sorted
+    cells seen so far and the output are kept between chunks, so memory grows
+    with the vertex and face count rather than the corner count. Return the
+    vertices (cm) and the (F, 3) faces, faces that collapsed while welding are
+    dropped. """
+def weldCorners(corners, scale=0.1):
+    count = len(corners)
+    faces = np.empty((count, 3), dtype=np.int64)
+    kept = 0
+    # Cells seen so far, sorted, and the vertex each one became
+    known = np.zeros(0, dtype=cellType)
+    knownIds = np.zeros(0, dtype=np.int64)
+    vertices = []
+    vertexCount = 0
+    for start in range(0, count, weldChunk):
+        chunk = np.asarray(corners[start:start + weldChunk], dtype=np.float64).reshape(-1, 3) * scale
+        cells = np.ascontiguousarray(np.rint(chunk * 10**keyPrecision), dtype=np.int64)
+        cells = cells.view(cellType).reshape(-1)
+        # return_index sorts stably, so first holds each cell's first corner
+        unique, first, inverse = np.unique(cells, return_index=True, return_inverse=True)
+        pos = np.searchsorted(known, unique)
+        found = pos < len(known)
+        found[found] = known[pos[found]] == unique[found]
+        ids = np.empty(len(unique), dtype=np.int64)
+        ids[found] = knownIds[pos[found]]
+        new = np.nonzero(~found)[0]
+        # Number new vertices in file order
+        new = new[np.argsort(first[new], kind="stable")]
+        ids[new] = vertexCount + np.arange(len(new))
+        vertexCount += len(new)
+        vertices.append(chunk[first[new]])
+        order = np.argsort(unique[new], kind="stable")
+        known = np.insert(known, pos[new[order]], unique[new[order]])
+        knownIds = np.insert(knownIds, pos[new[order]], ids[new[order]])
+        chunkFaces = ids[inverse.reshape(-1)].reshape(-1, 3)
+        keep = ((chunkFaces[:, 0] != chunkFaces[:, 1]) & (chunkFaces[:, 1] != chunkFaces[:, 2]) &
+                (chunkFaces[:, 0] != chunkFaces[:, 2]))
+        faces[kept:kept + np.count_nonzero(keep)] = chunkFaces[keep]
+        kept += np.count_nonzero(keep)
+    if vertices:
+        vertices = np.concatenate(vertices)
+    else:
+        vertices = np.zeros((0, 3), dtype=np.float64)
+    return vertices, faces[:kept]
+
+""" Load a mesh file as NumPy arrays without building per face Python
+    objects: binary STL is memory mapped, ASCII STL and OBJ are streamed.
+    Return (vertices, faces, badFaces, name) for batchPlan.meshPlan,
+    badFaces being the number of OBJ faces that weren't triangles. """
+def loadArrays(path, scale=0.1):
+    if not batchPlan.available:
+        raise ImportError("loadArrays needs NumPy")
+    ext = os.path.splitext(path)[1].lower()
+    badFaces = 0
+    if ext == ".obj":
+        corners, badFaces = streamedObjCorners(path)
+    elif ext == ".stl":
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            header = f.read(84)
+        # The same test as isBinaryStl without reading the whole file
+        binary = False
+        if len(header) == 84:
+            count = struct.unpack_from("<I", header, 80)[0]
+            binary = size == 84 + 50*count or header[:5].lower() != b"solid"
+        if binary:
+            corners = mappedStlCorners(path)
+        else:
+            corners = streamedStlCorners(path)
+    else:
+        raise ValueError("Unsupported mesh file '%s'" % path)
+    vertices, faces = weldCorners(corners, scale)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return vertices, faces, badFaces, name
+
+""" Build a meshTopology from a Fusion BRep body. Only the documented BRep API
+    is used so the adsk stand-in in fakeAdsk can be passed instead. Faces that
+    aren't triangles are skipped and listed in badFaces. The faces keep their
+    BRep order and faceRefs holds the matching BRepFace objects. """
+def fromBRep(body, name=None):
+    welder = vertexWelder()
+    faces = []
+    faceRefs = []
+    badFaces = []
+    brepFaces = body.faces
+    for i in range(brepFaces.count):
+        brepFace = brepFaces.item(i)
+        if brepFace.edges.count != 3:
+            badFaces.append(brepFace)
+            continue
+        corners = []
+        brepVertices = brepFace.vertices
+        for v in range(brepVertices.count):
+            p = brepVertices.item(v).geometry
+            corners.append((p.x, p.y, p.z))
+        # Wind the face so its normal agrees with the BRep face normal
+        ret = brepFace.evaluator.getNormalAtPoint(brepFace.pointOnFace)
+        normal = (ret[1].x, ret[1].y, ret[1].z)
+        if vDot(vCross(vSub(corners[1], corners[0]), vSub(corners[2], corners[0])), normal) < 0:
+            corners[1], corners[2] = corners[2], corners[1]
+        faces.append(tuple(welder.add(*p) for p in corners))
+        faceRefs.append(brepFace)
+    if name is None:
+        name = body.parentComponent.name
+    return meshTopology(welder.vertices, faces, faceRefs, badFaces, name)
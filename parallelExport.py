@@ -0,0 +1,143 @@
+""" Writes synthesized parts across a pool of processes.
+
+    Parallel export for the synthesized (partGen) engine. The mesh is planned
+    once in the parent, the planned parts are split into chunks in face order
+    and handed to a process pool, and a single manifest is merged from the
+    results. File names and manifest order don't depend on the worker count.
+    This runs headless only, Fusion's embedded interpreter can't spawn worker
+    processes.
+
+    Headless usage:
+        python parallelExport.py mesh.obj outDir [workers] [thickness mm] """
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from meshCore import digitsNeeded
+from exportJournal import exportJournal
+from progress import progressReporter
+import partGen
+import pipeline
+from placement import transformTable, writeAssembly, assemblyPath
+
+""" Number of parts handed to a worker at a time. """
+defaultChunkSize = 64
+
+""" Return the planned parts of a meshTopology in face order as a list of
+    (face index, file name, (side1, side2, side3)). """
+def planParts(topology):
+    return [(part.face, part.name, part.sides)
+            for part in pipeline.plan(pipeline.traverse(topology), topology.name)]
+
+""" Write one chunk of planned parts and return their manifest entries. Runs
+    in the worker processes, which also hash the parts as they write them so
+    the parent never reads them back. Parts too small for their hinges and
+    bits aren't written, their entries carry the reason as "fault". """
+def writeChunk(saveDir, params, chunk):
+    entries = []
+    for f, name, sides in chunk:
+        sha = hashlib.sha1()
+        try:
+            size = partGen.writePart(os.path.join(saveDir, name), sides[0], sides[1], sides[2], params, sha)
+        except ValueError as e:
+            entries.append(manifestEntry(f, name, sides, 0, None, str(e)))
+            continue
+        entries.append(manifestEntry(f, name, sides, size, sha.hexdigest()))
+    return entries
+
+def manifestEntry(f, name, sides, size, sha, fault=None):
+    entry = {
+        "face": f,
+        "file": name,
+        "bytes": size,
+        "sha1": sha,
+        "sides": [[s.index, round(s.length, 3), s.hinge, bool(s.convex)] for s in sides],
+    }
+    if fault:
+        entry["fault"] = fault
+    return entry
+
+""" Return the manifest path for a mesh exported into saveDir. """
+def manifestPath(saveDir, meshName):
+    return os.path.join(saveDir, meshName + "_manifest.json")
+
+def writeManifest(saveDir, meshName, params, entries):
+    manifest = {
+        "mesh": meshName,
+        "thickness": params.thickness,
+        "binaryDigits": params.binaryDigits,
+        "parts": entries,
+    }
+    with open(manifestPath(saveDir, meshName), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+""" Write every part of a meshTopology into saveDir using workers processes
+    (os.cpu_count() when None, everything in process when 1). Parts a
+    previous run recorded in the export journal are skipped unless resume is
+    False. progress is an optional progressReporter. The part manifest and
+    the assembly manifest are written alongside. Return the manifest entries
+    in face order. """
+def exportParallel(topology, saveDir, params, workers=None, chunkSize=defaultChunkSize, resume=True,
+                   progress=None):
+    parts = planParts(topology)
+    meshName = topology.name
+    template = repr((params.thickness, params.binaryDigits))
+    journal = exportJournal(saveDir, meshName, [name for f, name, sides in parts], template)
+    journal.start()
+    entries = {}
+    todo = []
+    for f, name, sides in parts:
+        if resume and journal.isDone(name):
+            entries[f] = manifestEntry(f, name, sides, os.path.getsize(os.path.join(saveDir, name)),
+                                       journal.done[name])
+        else:
+            todo.append((f, name, sides))
+    if progress and len(entries):
+        progress.step(len(entries))
+    chunks = [todo[i:i + chunkSize] for i in range(0, len(todo), chunkSize)]
+
+    def finished(chunkEntries):
+        for entry in chunkEntries:
+            entries[entry["face"]] = entry
+            if "fault" not in entry:
+                journal.record(entry["file"], sha=entry["sha1"])
+        if progress:
+            progress.step(len(chunkEntries))
+
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                finished(writeChunk(saveDir, params, chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map hands results back in submission order whatever finishes first
+                for chunkEntries in pool.map(writeChunk, [saveDir] * len(chunks), [params] * len(chunks), chunks):
+                    finished(chunkEntries)
+    finally:
+        journal.close()
+    entries = [entries[f] for f, name, sides in parts]
+    writeManifest(saveDir, meshName, params, entries)
+    writeAssembly(assemblyPath(saveDir, meshName), transformTable(topology),
+                  [(entry["face"], entry["file"]) for entry in entries if "fault" not in entry], params.thickness)
+    return entries
+
+def main():
+    from meshIO import loadMesh
+    if len(sys.argv) < 3:
+        print("usage: python parallelExport.py mesh.obj|mesh.stl outDir [workers] [thickness]")
+        return
+    topology = loadMesh(sys.argv[1])
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    thickness = float(sys.argv[4]) if len(sys.argv) > 4 else 3.0
+    params = partGen.partParams(thickness, digitsNeeded(topology.edgeCount()))
+    if not os.path.isdir(sys.argv[2]):
+        os.makedirs(sys.argv[2])
+    progress = progressReporter(topology.faceCount())
+    exportParallel(topology, sys.argv[2], params, workers, progress=progress)
+    progress.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+""" Bundles exported parts into a single zip or tar archive.
+
+    Instead of one loose STL per triangle, every part is streamed into one
+    archive as it is finished, so nothing but the part being added is held in
+    memory. The archive kind follows the file extension: .zip (deflated),
+    .tar, .tar.gz or .tgz. On close a manifest.json index listing every
+    member with its size, SHA-1 and any extra info (face, sides...) is added
+    as the last member. """
+
+import hashlib
+import io
+import json
+import tarfile
+import time
+import zipfile
+
+""" Name of the index member. """
+manifestName = "manifest.json"
+
+""" Return True if path names an archive partArchive can write. """
+def isArchivePath(path):
+    lower = path.lower()
+    return lower.endswith((".zip", ".tar", ".tar.gz", ".tgz"))
+
+class partArchive:
+
+    def __init__(self, path):
+        self.path = path
+        self.index = []
+        self.zip = None
+        self.tar = None
+        lower = path.lower()
+        if lower.endswith(".zip"):
+            self.zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        elif lower.endswith((".tar.gz", ".tgz")):
+            self.tar = tarfile.open(path, "w:gz")
+        elif lower.endswith(".tar"):
+            self.tar = tarfile.open(path, "w")
+        else:
+            raise ValueError("Unsupported archive '%s', use .zip, .tar, .tar.gz or .tgz" % path)
+
+    """ Add a member holding data. """
+    def add(self, name, data, info=None):
+        if self.zip:
+            with self.zip.open(name, "w") as f:
+                f.write(data)
+        else:
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mtime = time.time()
+            self.tar.addfile(member, io.BytesIO(data))
+        self.record(name, len(data), hashlib.sha1(data).hexdigest(), info)
+
+    """ Add a member streamed from the file at source. """
+    def addFile(self, name, source, info=None):
+        sha = hashlib.sha1()
+        size = 0
+        with open(source, "rb") as src:
+            if self.zip:
+                with self.zip.open(name, "w") as f:
+                    for block in iter(lambda: src.read(1 << 16), b""):
+                        sha.update(block)
+                        size += len(block)
+                        f.write(block)
+            else:
+                member = self.tar.gettarinfo(source, arcname=name)
+                self.tar.addfile(member, hashingReader(src, sha))
+                size = member.size
+        self.record(name, size, sha.hexdigest(), info)
+
+    def record(self, name, size, sha, info):
+        entry = {"file": name, "bytes": size, "sha1": sha}
+        if info:
+            entry.update(info)
+        self.index.append(entry)
+
+    """ Write the manifest and close the archive. """
+    def close(self):
+        manifest = json.dumps({"parts": self.index}, indent=1).encode("utf-8")
+        if self.zip:
+            self.zip.writestr(manifestName, manifest)
+            self.zip.close()
+        else:
+            member = tarfile.TarInfo(manifestName)
+            member.size = len(manifest)
+            member.mtime = time.time()
+            self.tar.addfile(member, io.BytesIO(manifest))
+            self.tar.close()
+
+""" File wrapper hashing what tarfile reads through it. """
+class hashingReader:
+    def __init__(self, f, sha):
+        self.f = f
+        self.sha = sha
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha.update(data)
+        return data
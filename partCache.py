@@ -0,0 +1,102 @@
+""" Content addressed cache of exported triangle parts.
+
+    Two faces that agree on side lengths, hinges, convexity, bit pattern and
+    center body produce identical parts, so only the first is combined and
+    exported and the rest are copied from it. The cache keeps its own copy of
+    every part, named by its signature, in a .partcache directory in the
+    export directory, so later runs into the same directory reuse parts too
+    and overwriting an exported part never changes what the cache hands out.
+    Edge indices are unique within a mesh so in a single run only faces that
+    end up with the same bit patterns (IE with binaryDigits spent on padding
+    only) share parts, most hits come from re-running into a directory. """
+
+import hashlib
+import json
+import os
+import shutil
+
+from meshCore import layoutTable
+
+""" Directory in the export directory the cached parts are kept in, and the
+    name of the cache index inside it. """
+cacheDirName = ".partcache"
+indexName = "index.json"
+
+""" Side lengths are quantized to the precision the template expressions are
+    set with, "%.3f mm". """
+lengthDecimals = 3
+
+""" Return a hash of the template so parts made from an edited template are
+    never reused. params is an iterable of (name, expression), geometry an
+    iterable of anything else describing the template's bodies, IE their
+    volumes, which catches sketch and feature edits the parameters don't. """
+def templateKey(params, geometry=()):
+    text = repr((sorted(params), list(geometry)))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+""" Return the signature of a part given its three (sorted) sides, the total
+    number of binary digits, the template key and the name of its center body. """
+def partSignature(side1, side2, side3, totalDigits, template="", core=None):
+    layouts = layoutTable(totalDigits)
+    sides = []
+    for side in (side1, side2, side3):
+        sides.append((
+            "%.*f" % (lengthDecimals, side.length),
+            side.hinge,
+            bool(side.convex),
+            layouts.mask(side.index, side.hinge, side.convex),
+        ))
+    text = repr((sides, template, core))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class partCache:
+
+    def __init__(self, saveDir):
+        self.cacheDir = os.path.join(saveDir, cacheDirName)
+        self.path = os.path.join(self.cacheDir, indexName)
+        self.parts = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.parts = json.load(f)
+            except ValueError:
+                # A corrupt index only costs us the reuse, start over
+                self.parts = {}
+
+    """ Return the cache's copy of the part with the signature, or None. """
+    def lookup(self, signature):
+        name = self.parts.get(signature)
+        if name:
+            path = os.path.join(self.cacheDir, os.path.basename(name))
+            if os.path.exists(path):
+                self.hits += 1
+                return path
+        self.misses += 1
+        return None
+
+    """ Copy the finished part at path into the cache under its signature.
+        Compressed parts keep their ".gz" suffix. """
+    def store(self, signature, path):
+        name = signature + (".stl.gz" if path.endswith(".gz") else ".stl")
+        if not os.path.isdir(self.cacheDir):
+            os.makedirs(self.cacheDir)
+        shutil.copyfile(path, os.path.join(self.cacheDir, name))
+        self.parts[signature] = name
+
+    def save(self):
+        if not os.path.isdir(self.cacheDir):
+            os.makedirs(self.cacheDir)
+        with open(self.path, "w") as f:
+            json.dump(self.parts, f, indent=1, sort_keys=True)
+
+    def hitRate(self):
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return float(self.hits) / total
+
+    def report(self):
+        return "%i of %i parts reused from the part cache (%.0f%%)" % (
+            self.hits, self.hits + self.misses, self.hitRate() * 100)
@@ -0,0 +1,459 @@
+""" Synthesizes triangle parts as meshes without the Fusion template.
+
+    An alternate export engine. Instead of setting the template's side
+    parameters, recomputing and combining its bodies, each part is built
+    directly as one closed triangle shell:
+        frame  - the triangle plate, thickness mm tall. It stops plateInset
+                 inside each side so the neighbouring part's knuckles can turn
+        hinges - one knuckle (male) or two knuckles (female) along each side,
+                 round and the full thickness across with their axis on the
+                 side line, hingeGap apart. The male knuckle has a pin at each
+                 end that reaches across the gap into a socket in the facing
+                 end of a female knuckle
+        bits   - raised blocks on the top and bottom faces following the same
+                 bit layout the CAD combine uses, plus the concavity markers
+    Nothing overlaps. The plate's faces are triangulated around where the
+    knuckles and bits join them, so every edge of the STL is shared by
+    exactly two facets and parts print as they are. Knuckles and bits keep
+    clear of the corners by a distance that depends on the corner's angle.
+    A knuckle that no longer has room is dropped and a pin only reaches out
+    where there is room for its socket. Parts too small for the bit band raise
+    ValueError. Parts are built with side one along X, turned into the
+    template's frame, see placement.partFrame. The proportions are derived
+    from the template parameters but approximate the template's sketches, use
+    the CAD engine when the exact template geometry matters.
+
+    Headless usage:
+        python partGen.py mesh.obj outDir [thickness mm] [binaryDigits] """
+
+import math
+import os
+import sys
+
+from meshCore import hingeType, planIter, sortSides, partName, layoutTable, digitsNeeded, vCross, vDot, vSub
+from stlWriter import stlBytes, writeStlTo, hashingWriter
+
+""" The dimensions parts are synthesized with, in mm. """
+class partParams:
+
+    def __init__(self, thickness=3.0, binaryDigits=12, minAltitude=0.0):
+        self.thickness = float(thickness)
+        self.binaryDigits = int(binaryDigits)
+        self.minAltitude = float(minAltitude)
+        # Knuckles are as round as the part is thick
+        self.hingeRadius = self.thickness / 2.0
+        # Space between male and female knuckles, and around a knuckle as it turns
+        self.hingeGap = self.thickness / 4.0
+        # The plate stops a knuckle and a gap short of the side
+        self.plateInset = self.hingeRadius + self.hingeGap
+        # Pins reach pinDepth into sockets a gap wider and deeper than them
+        self.pinRadius = self.thickness / 4.0
+        self.pinDepth = self.thickness / 3.0
+        self.socketRadius = self.pinRadius + self.hingeGap / 2.0
+        self.socketDepth = self.pinDepth + self.hingeGap
+        # Bits are raised a third of the thickness, a gap inside the plate's edge
+        self.bitHeight = self.thickness / 3.0
+        self.bitInset = self.plateInset + self.hingeGap
+        self.bitSize = self.thickness / 2.0
+        # Segments of a knuckle's half round and of a pin's circle
+        self.arcSegments = 8
+        self.pinSegments = 16
+
+    """ Return partParams for a dict of template parameter values in mm. """
+    @classmethod
+    def fromTemplate(cls, values):
+        return cls(values.get("thickness", 3.0), values.get("binaryDigits", 12),
+                   values.get("minAltitude", 0.0))
+
+    """ Return the inset of the inner edge of the bit band, the plate inside
+        it is left plain. """
+    def bandInset(self):
+        return self.bitInset + self.bitSize + self.hingeGap
+
+""" Collects the triangles of a closed shell. Every face is added with a
+    direction pointing out of the solid and its triangles are wound to match,
+    counter clockwise seen from outside. The triangles of one face all turn
+    the same way, so the winding is checked once per face. """
+class shell:
+
+    def __init__(self):
+        self.triangles = []
+
+    """ Return True if the triangle a, b, c turns away from out. """
+    def flipped(self, a, b, c, out):
+        return vDot(vCross(vSub(b, a), vSub(c, a)), out) < 0
+
+    def add(self, a, b, c, flip):
+        self.triangles.append((a, c, b) if flip else (a, b, c))
+
+    def triangle(self, a, b, c, out):
+        self.add(a, b, c, self.flipped(a, b, c, out))
+
+    """ Add the quad with corners a, b, c, d in order around it. """
+    def quad(self, a, b, c, d, out):
+        flip = self.flipped(a, b, c, out)
+        self.add(a, b, c, flip)
+        self.add(a, c, d, flip)
+
+    """ Add a fan from center over a chain of points, closing the chain if
+        loop is set. """
+    def fan(self, center, points, out, loop=False):
+        flip = self.flipped(center, points[0], points[1], out)
+        for i in range(len(points) - (0 if loop else 1)):
+            self.add(center, points[i], points[(i + 1) % len(points)], flip)
+
+""" Places points along one side of the triangle laid out by
+    triangleCorners: u from the side's first corner towards its second, d
+    inwards from the side line, z up from the bottom of a plate thickness
+    tall. Points come out turned half a turn about the Y axis, taking the
+    corner of sides one and two from (s1, 0, 0) to the origin with side one
+    along +X and the top (out of the mesh) facing -Z, as in the template.
+    They are kept so faces meeting along an edge get the exact same corners. """
+class sideFrame:
+
+    def __init__(self, p, q, s1, thickness):
+        self.length = ((q[0] - p[0])**2 + (q[1] - p[1])**2)**.5
+        self.ux, self.uy = (q[0] - p[0]) / self.length, (q[1] - p[1]) / self.length
+        # The interior of a counter clockwise triangle lies to the left of each side
+        self.nx, self.ny = -self.uy, self.ux
+        self.x, self.y = s1 - p[0], p[1]
+        self.thickness = thickness
+        self.points = {}
+
+    def at(self, u, d, z):
+        key = (u, d, z)
+        point = self.points.get(key)
+        if point is None:
+            point = self.points[key] = (self.x - self.ux*u - self.nx*d, self.y + self.uy*u + self.ny*d,
+                                        self.thickness - z)
+        return point
+
+    """ Return the template frame direction of the frame direction (du, dd, dz). """
+    def direction(self, du, dd, dz):
+        return (-self.ux*du - self.nx*dd, self.uy*du + self.ny*dd, -dz)
+
+""" Where a side's knuckles and bits go, in u along the side. start and end
+    bound the bit band, see bandClearance. knuckles holds (u0, u1, startEnd,
+    endEnd), an end being "pin", "socket" or None. bits holds (u0, u1, top)
+    and bitTop is the inset of the bits' inner edge. edge holds the sorted u
+    of the band's and the knuckles' ends, where the plate's edge is split,
+    and bitBreaks those of the band's and the bits' ends. """
+class sideLayout:
+
+    def __init__(self, side, length, startAngle, endAngle, params):
+        g = params.hingeGap
+        self.start = bandClearance(startAngle, params)
+        self.end = length - bandClearance(endAngle, params)
+        if self.end <= self.start:
+            raise ValueError("A %.1f mm side is too short for the hinges and bits of a %g mm part"
+                             % (length, params.thickness))
+
+        self.knuckles = []
+        first, last = knuckleClearance(startAngle, params), length - knuckleClearance(endAngle, params)
+        reach = 2*g + params.pinDepth
+        if side.hinge == hingeType.male:
+            u0, u1 = max(length/3.0 + g, first), min(2*length/3.0 - g, last)
+            if u1 - u0 > g:
+                self.knuckles.append((u0, u1,
+                                      "pin" if u0 == length/3.0 + g and u0 - reach >= first else None,
+                                      "pin" if u1 == 2*length/3.0 - g and u1 + reach <= last else None))
+        elif side.hinge == hingeType.female:
+            # Each socket is in the knuckle end facing the male knuckle
+            u0, u1 = max(g, first), min(length/3.0 - g, last)
+            if u1 - u0 >= params.socketDepth + g:
+                self.knuckles.append((u0, u1, None, "socket"))
+            u0, u1 = max(2*length/3.0 + g, first), min(length - g, last)
+            if u1 - u0 >= params.socketDepth + g:
+                self.knuckles.append((u0, u1, "socket", None))
+
+        # Bit i sits in slot i of binaryDigits + 2 slots along the band, the
+        # outer slots hold the concavity markers
+        digits = params.binaryDigits
+        slot = (self.end - self.start) / (digits + 2)
+        size = min(params.bitSize, slot * 0.8)
+        self.bitTop = params.bitInset + size
+        self.bits = []
+        for name in layoutTable(digits).names(side.index, side.hinge, side.convex):
+            if name[0] == "l":
+                center = self.start + slot / 2.0
+            elif name[0] == "r":
+                center = self.end - slot / 2.0
+            else:
+                center = self.start + (int(name[:-1]) + .5) * slot
+            self.bits.append((center - size/2.0, center + size/2.0, name[-1] == "t"))
+
+        edge = set([self.start, self.end])
+        for k in self.knuckles:
+            edge.update(k[:2])
+        self.edge = sorted(edge)
+        bitBreaks = set([self.start, self.end])
+        for b in self.bits:
+            bitBreaks.update(b[:2])
+        self.bitBreaks = sorted(bitBreaks)
+
+    """ Return the edge breaks from u0 to u1. """
+    def between(self, u0, u1):
+        return [u for u in self.edge if u0 <= u <= u1]
+
+    """ Return True if u0..u1 lies within a knuckle. """
+    def inKnuckle(self, u0, u1):
+        return any(k[0] <= u0 and u1 <= k[1] for k in self.knuckles)
+
+    """ Return True if u0..u1 lies within a bit on the top (or bottom) face. """
+    def inBit(self, u0, u1, top):
+        return any(b[0] <= u0 and u1 <= b[1] and b[2] == top for b in self.bits)
+
+""" Return how far from a corner with the given angle (radians) the bit band
+    of a side may start, clear of the other side's band, which reaches
+    bandInset into the plate. """
+def bandClearance(angle, params):
+    band = params.bandInset()
+    c, s = math.cos(angle), math.sin(angle)
+    if c > 0:
+        return band * (1 + c) / s + params.hingeGap
+    return (band + params.plateInset * c) / s + params.hingeGap
+
+""" Return how far from a corner with the given angle (radians) the knuckles
+    of a side may start, a gap clear of the other side's knuckles. """
+def knuckleClearance(angle, params):
+    clear = params.plateInset + params.hingeGap
+    c, s = math.cos(angle), math.sin(angle)
+    if c > 0:
+        return (clear + params.plateInset * c) / s
+    return (clear - params.hingeRadius * c) / s
+
+""" Add the triangles between two rows of points along a side, lower at
+    inset d0 and upper at d1, given by their u. Both rows start and end at
+    the same u. """
+def addRows(s, f, lower, d0, upper, d1, z, out):
+    flip = s.flipped(f.at(lower[0], d0, z), f.at(lower[-1], d0, z), f.at(upper[0], d1, z), out)
+    i = j = 0
+    while i < len(lower) - 1 or j < len(upper) - 1:
+        if j == len(upper) - 1 or (i < len(lower) - 1 and lower[i + 1] <= upper[j + 1]):
+            s.add(f.at(lower[i], d0, z), f.at(lower[i + 1], d0, z), f.at(upper[j], d1, z), flip)
+            i += 1
+        else:
+            s.add(f.at(lower[i], d0, z), f.at(upper[j + 1], d1, z), f.at(upper[j], d1, z), flip)
+            j += 1
+
+""" Return the corners of the triangle with the given side lengths, side one
+    along the X axis and the triangle above it, counter clockwise. Side two
+    runs from the second corner to the third, side three back to the first. """
+def triangleCorners(s1, s2, s3):
+    x = (s1**2 + s3**2 - s2**2) / (2.0 * s1)
+    y = max(s3**2 - x**2, 0.0)**.5
+    return [(0.0, 0.0), (s1, 0.0), (x, y)]
+
+""" Return the angle (radians) of the triangle at corner k. """
+def cornerAngle(corners, k):
+    p, a, b = corners[k], corners[(k + 1) % 3], corners[k - 1]
+    ax, ay, bx, by = a[0] - p[0], a[1] - p[1], b[0] - p[0], b[1] - p[1]
+    return math.atan2(abs(ax*by - ay*bx), ax*bx + ay*by)
+
+""" Return the (d, z) corners of a knuckle's end, starting where it meets the
+    plate's bottom, around the half round and back along the top. """
+def knuckleProfile(params):
+    r, t, n = params.hingeRadius, params.thickness, params.arcSegments
+    arc = [(0.0, 0.0)]
+    for i in range(1, n):
+        a = 1.5*math.pi - math.pi*i/n
+        arc.append((r*math.cos(a), r + r*math.sin(a)))
+    arc.append((0.0, t))
+    return arc
+
+""" Add the flat end of a knuckle at u, facing direction (-1 or 1) along the
+    side. hole is None, or the radius of the pin or socket circle, given as
+    (d, z) points, that the end is left open around. """
+def addKnuckleEnd(s, f, u, direction, profile, params, hole=None):
+    w, r, t = params.plateInset, params.hingeRadius, params.thickness
+    outline = [(w, 0.0)] + profile + [(w, t)]
+    out = f.direction(direction, 0, 0)
+    if hole is None:
+        s.fan(f.at(u, 0.0, r), [f.at(u, d, z) for d, z in outline], out, loop=True)
+        return
+    # Zip the outline and the circle together by their angle around the
+    # knuckle's axis. Circle points before the middle of an outline edge join
+    # the edge's first corner, the rest its second
+    def unwrap(angles):
+        for i in range(1, len(angles)):
+            while angles[i] > angles[i - 1]:
+                angles[i] -= 2*math.pi
+        return angles
+    outer = unwrap([math.atan2(z - r, d) for d, z in outline])
+    outer.append(outer[0] - 2*math.pi)
+    inner = [outer[0] - 2*math.pi*j/len(hole) for j in range(len(hole) + 1)]
+    outline = [f.at(u, d, z) for d, z in outline]
+    circle = [f.at(u, d, z) for d, z in hole]
+    flip = s.flipped(outline[0], outline[1], circle[0], out)
+    i = j = 0
+    while i < len(outline) or j < len(circle):
+        if i < len(outline) and (j == len(circle) or inner[j + 1] <= (outer[i] + outer[i + 1]) / 2):
+            s.add(outline[i], outline[(i + 1) % len(outline)], circle[j % len(circle)], flip)
+            i += 1
+        else:
+            s.add(outline[i % len(outline)], circle[(j + 1) % len(circle)], circle[j], flip)
+            j += 1
+
+""" Return the (d, z) points of a circle of the given radius around the
+    knuckle axis, starting at the angle of the knuckle end's first corner so
+    they zip with it, see addKnuckleEnd. """
+def axisCircle(radius, params):
+    r, w, n = params.hingeRadius, params.plateInset, params.pinSegments
+    start = math.atan2(-r, w)
+    return [(radius*math.cos(start - 2*math.pi*j/n), r + radius*math.sin(start - 2*math.pi*j/n))
+            for j in range(n)]
+
+""" Add a pin sticking out of the knuckle end at u (direction 1) or a socket
+    going into it (direction -1), length along the side. face is the
+    direction the knuckle end faces. """
+def addPinOrSocket(s, f, u, face, circle, length, direction, params):
+    r = params.hingeRadius
+    tip = u + face*direction*length
+    n = len(circle)
+    for j in range(n):
+        (d0, z0), (d1, z1) = circle[j], circle[(j + 1) % n]
+        # Outwards from the pin's axis, towards it in a socket
+        radial = (direction*(d0 + d1)/2.0, direction*((z0 + z1)/2.0 - r))
+        s.quad(f.at(u, d0, z0), f.at(u, d1, z1), f.at(tip, d1, z1), f.at(tip, d0, z0),
+               f.direction(0, radial[0], radial[1]))
+    s.fan(f.at(tip, 0.0, r), [f.at(tip, d, z) for d, z in circle], f.direction(face, 0, 0), loop=True)
+
+""" Return every triangle of the part for the given (sorted) sides. """
+def partTriangles(side1, side2, side3, params):
+    t, w, bi, h = params.thickness, params.plateInset, params.bitInset, params.bitHeight
+    band = params.bandInset()
+    sides = (side1, side2, side3)
+    corners = triangleCorners(side1.length, side2.length, side3.length)
+    frames = [sideFrame(corners[k], corners[(k + 1) % 3], side1.length, t) for k in range(3)]
+    angles = [cornerAngle(corners, k) for k in range(3)]
+    layouts = [sideLayout(sides[k], frames[k].length, angles[k], angles[(k + 1) % 3], params)
+               for k in range(3)]
+    # How far along its side the corner of an inset of d lies
+    cot = [1.0 / math.tan(a / 2.0) for a in angles]
+    def cornerAt(k, d, z):
+        return frames[k % 3].at(d * cot[k % 3], d, z)
+    s = shell()
+
+    for z, up in ((t, 1), (0.0, -1)):
+        top = up > 0
+        out = frames[0].direction(0, 0, up)
+        # The plain middle of the plate, inside every bit band
+        outline = []
+        for k in range(3):
+            outline.append(cornerAt(k, band, z))
+            outline.extend(frames[k].at(u, band, z) for u in (layouts[k].start, layouts[k].end))
+        middle = (sum(p[0] for p in outline) / len(outline), sum(p[1] for p in outline) / len(outline),
+                  outline[0][2])
+        s.fan(middle, outline, out, loop=True)
+        for k in range(3):
+            f, lay = frames[k], layouts[k]
+            # The bit band, open where bits stand on it
+            addRows(s, f, lay.between(lay.start, lay.end), w, lay.bitBreaks, bi, z, out)
+            for u0, u1 in zip(lay.bitBreaks, lay.bitBreaks[1:]):
+                if not lay.inBit(u0, u1, top):
+                    s.quad(f.at(u0, bi, z), f.at(u1, bi, z), f.at(u1, lay.bitTop, z), f.at(u0, lay.bitTop, z), out)
+            addRows(s, f, lay.bitBreaks, lay.bitTop, [lay.start, lay.end], band, z, out)
+            # The flat of each knuckle, level with the plate
+            for u0, u1, startEnd, endEnd in lay.knuckles:
+                edge = [f.at(u, w, z) for u in reversed(lay.between(u0, u1))]
+                s.fan(f.at(u0, 0.0, z), [f.at(u1, 0.0, z)] + edge, out)
+            # The corner between this side's band and the previous side's,
+            # taking in the plate's edge up to the knuckles near the corner
+            prev, prevLay = frames[k - 1], layouts[k - 1]
+            chain = [f.at(lay.start, d, z) for d in (band, lay.bitTop, bi)]
+            chain.extend(f.at(u, w, z) for u in reversed(lay.edge) if u <= lay.start)
+            chain.append(cornerAt(k, w, z))
+            chain.extend(prev.at(u, w, z) for u in reversed(prevLay.edge) if u >= prevLay.end)
+            chain.extend(prev.at(prevLay.end, d, z) for d in (bi, prevLay.bitTop, band))
+            s.fan(cornerAt(k, band, z), chain, out)
+
+    profile = knuckleProfile(params)
+    for k in range(3):
+        f, lay = frames[k], layouts[k]
+        # The plate's edge, except where knuckles join it
+        bottom = [cornerAt(k, w, 0.0)] + [f.at(u, w, 0.0) for u in lay.edge] + [cornerAt(k + 1, w, 0.0)]
+        top = [cornerAt(k, w, t)] + [f.at(u, w, t) for u in lay.edge] + [cornerAt(k + 1, w, t)]
+        us = [None] + lay.edge + [None]
+        for i in range(len(bottom) - 1):
+            if us[i] is not None and us[i + 1] is not None and lay.inKnuckle(us[i], us[i + 1]):
+                continue
+            s.quad(bottom[i], bottom[i + 1], top[i + 1], top[i], f.direction(0, -1, 0))
+
+        for u0, u1, startEnd, endEnd in lay.knuckles:
+            for i in range(len(profile) - 1):
+                (d0, z0), (d1, z1) = profile[i], profile[i + 1]
+                s.quad(f.at(u0, d0, z0), f.at(u1, d0, z0), f.at(u1, d1, z1), f.at(u0, d1, z1),
+                       f.direction(0, (d0 + d1)/2.0, (z0 + z1)/2.0 - params.hingeRadius))
+            for u, face, end in ((u0, -1, startEnd), (u1, 1, endEnd)):
+                if end == "pin":
+                    circle = axisCircle(params.pinRadius, params)
+                    addKnuckleEnd(s, f, u, face, profile, params, circle)
+                    addPinOrSocket(s, f, u, face, circle, 2*params.hingeGap + params.pinDepth, 1, params)
+                elif end == "socket":
+                    circle = axisCircle(params.socketRadius, params)
+                    addKnuckleEnd(s, f, u, face, profile, params, circle)
+                    addPinOrSocket(s, f, u, face, circle, params.socketDepth, -1, params)
+                else:
+                    addKnuckleEnd(s, f, u, face, profile, params)
+
+        for u0, u1, top in lay.bits:
+            z0, z1 = (t, t + h) if top else (0.0, -h)
+            for d, inwards in ((bi, -1), (lay.bitTop, 1)):
+                s.quad(f.at(u0, d, z0), f.at(u1, d, z0), f.at(u1, d, z1), f.at(u0, d, z1),
+                       f.direction(0, inwards, 0))
+            s.quad(f.at(u0, bi, z1), f.at(u1, bi, z1), f.at(u1, lay.bitTop, z1), f.at(u0, lay.bitTop, z1),
+                   f.direction(0, 0, 1 if top else -1))
+            for u, face in ((u0, -1), (u1, 1)):
+                s.quad(f.at(u, bi, z0), f.at(u, lay.bitTop, z0), f.at(u, lay.bitTop, z1), f.at(u, bi, z1),
+                       f.direction(face, 0, 0))
+
+    return s.triangles
+
+""" Return the binary STL of the part for the given sides. """
+def partBytes(side1, side2, side3, params):
+    return stlBytes(partTriangles(side1, side2, side3, params), "Mesh Maker part")
+
+""" Synthesize the part for the given sides and stream it to path. Return
+    the number of bytes written. sha, a hashlib object, is updated with the
+    file's contents if given. Nothing is written if the part raises
+    ValueError. """
+def writePart(path, side1, side2, side3, params, sha=None):
+    triangles = partTriangles(side1, side2, side3, params)
+    with open(path, "wb") as f:
+        if sha is not None:
+            f = hashingWriter(f, sha)
+        return writeStlTo(f, triangles, "Mesh Maker part")
+
+""" Write a part for every face of a meshTopology into saveDir. Return the
+    list of file names written and the faces too small for a part. """
+def generateParts(topology, saveDir, params):
+    names = []
+    skipped = []
+    for sideTup, f in planIter(topology):
+        side1, side2, side3 = sortSides(sideTup)
+        name = partName(topology.name, side1, side2, side3) + ".stl"
+        try:
+            writePart(os.path.join(saveDir, name), side1, side2, side3, params)
+        except ValueError:
+            skipped.append(f)
+            continue
+        names.append(name)
+    return names, skipped
+
+def main():
+    import time
+    from meshIO import loadMesh
+    if len(sys.argv) < 3:
+        print("usage: python partGen.py mesh.obj|mesh.stl outDir [thickness] [binaryDigits]")
+        return
+    topology = loadMesh(sys.argv[1])
+    thickness = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+    digits = int(sys.argv[4]) if len(sys.argv) > 4 else digitsNeeded(topology.edgeCount())
+    if not os.path.isdir(sys.argv[2]):
+        os.makedirs(sys.argv[2])
+    start = time.perf_counter()
+    names, skipped = generateParts(topology, sys.argv[2], partParams(thickness, digits))
+    print("Wrote %i parts in %.2f s, %i faces too small" % (len(names), time.perf_counter() - start, len(skipped)))
+
+if __name__ == "__main__":
+    main()
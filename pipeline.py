@@ -0,0 +1,210 @@
+""" Generator stages connecting mesh traversal to the file writer.
+
+    Export as a chain of generator stages:
+        traverse -> plan -> validate -> build -> write
+    Each stage takes the previous stage's iterator and yields one item per
+    face, so only the faces in flight are held in memory however large the
+    mesh. buffered() runs everything upstream of it on a worker thread behind
+    a bounded queue so, for example, parts can be built while earlier ones
+    are still being written. The add-in builds on Fusion's main thread and
+    ends the chain with deliver() instead of write(), handing each part to a
+    fileWriter.backgroundWriter.
+
+    Headless usage (synthesized parts), outDir may also be a .zip/.tar/.tar.gz
+    to bundle every part into one archive:
+        python pipeline.py mesh.obj outDir [thickness mm]
+    With NumPy the mesh is loaded into arrays (meshIO.loadArrays) and
+    traversed with batchPlan.traverse, so large meshes never become a
+    meshTopology. """
+
+import os
+import sys
+import threading
+from queue import Queue, Full
+
+from meshCore import planIter, sortSides, partName, triangleFault
+
+""" A face on its way through the pipeline. sides are sorted longest first,
+    fault is set by validate and data (the part's file contents) by build. """
+class plannedPart:
+    def __init__(self, face, sides, name):
+        self.face = face
+        self.sides = sides
+        self.name = name
+        self.fault = None
+        self.data = None
+
+""" Yield (face index, sides) for every face of a meshTopology, edges
+    renumbered by codes and faces visited in order if given. """
+def traverse(topology, codes=None, order=None):
+    for sideTup, f in planIter(topology, codes, order):
+        yield f, sideTup
+
+""" Yield a plannedPart for every traversed face. """
+def plan(faces, meshName):
+    for f, sideTup in faces:
+        sides = sortSides(sideTup)
+        yield plannedPart(f, sides, partName(meshName, *sides) + ".stl")
+
+""" Set each part's fault, see meshCore.triangleFault. Faulty parts are
+    passed on so later stages can decide what to do with them. """
+def validate(parts, minAlt):
+    for part in parts:
+        side1, side2, side3 = part.sides
+        part.fault = triangleFault(side1.length, side2.length, side3.length, minAlt)
+        yield part
+
+""" Set each part's data to builder(part). """
+def build(parts, builder):
+    for part in parts:
+        part.data = builder(part)
+        yield part
+
+""" A built part that is already a file, such as Fusion's STL export in a
+    temp directory. It is moved into place, or copied if copy is set (a part
+    cache entry). """
+class partFile:
+    def __init__(self, path, copy=False):
+        self.path = path
+        self.copy = copy
+
+""" Hand each built part's data, file contents or a partFile, to a
+    fileWriter.backgroundWriter putting it in saveDir, dropping the data once
+    handed over. onDone(part, path) runs on the writer thread once the part
+    is in place. With info set the parts carry their partInfo, for a writer
+    streaming into a partArchive. """
+def deliver(parts, writer, saveDir, onDone=None, info=False):
+    for part in parts:
+        if part.data is not None:
+            path = os.path.join(saveDir, part.name)
+            details = partInfo(part.face, part.sides) if info else None
+            done = (lambda path, part=part: onDone(part, path)) if onDone else None
+            if not isinstance(part.data, partFile):
+                writer.write(path, part.data, done, details)
+            elif part.data.copy:
+                writer.copy(part.data.path, writer.finalPath(path), done, details)
+            else:
+                writer.move(part.data.path, path, done, details)
+            part.data = None
+        yield part
+
+""" Write each built part's data to saveDir, dropping the data once written. """
+def write(parts, saveDir):
+    for part in parts:
+        if part.data is not None:
+            with open(os.path.join(saveDir, part.name), "wb") as f:
+                f.write(part.data)
+            part.data = None
+        yield part
+
+""" Return the archive manifest info of the part of face f, see partArchive. """
+def partInfo(f, sides):
+    return {
+        "face": f,
+        "sides": [[s.index, round(s.length, 3), s.hinge, bool(s.convex)] for s in sides],
+    }
+
+""" Add each built part to a partArchive, dropping the data once added. """
+def archive(parts, target):
+    for part in parts:
+        if part.data is not None:
+            target.add(part.name, part.data, partInfo(part.face, part.sides))
+            part.data = None
+        yield part
+
+class stageError:
+    def __init__(self, error):
+        self.error = error
+
+endOfStage = object()
+
+""" Run the items iterator on a worker thread, keeping at most maxsize items
+    queued. Exceptions raised upstream are re-raised in the consumer. If the
+    consumer stops early the worker gives up at its next put. """
+def buffered(items, maxsize=16):
+    queue = Queue(maxsize)
+    stopped = threading.Event()
+    # Return False once the consumer has stopped instead of waiting on a full queue
+    def put(item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(stageError(e))
+            return
+        put(endOfStage)
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is endOfStage:
+                break
+            if isinstance(item, stageError):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+def main():
+    import time
+    from meshCore import digitsNeeded
+    from meshIO import loadMesh, loadArrays
+    from partArchive import partArchive, isArchivePath
+    import batchPlan
+    import partGen
+    if len(sys.argv) < 3:
+        print("usage: python pipeline.py mesh.obj|mesh.stl outDir [thickness]")
+        return
+    start = time.perf_counter()
+    if batchPlan.available:
+        vertices, faces, badFaces, meshName = loadArrays(sys.argv[1])
+        mesh = batchPlan.meshPlan(vertices, faces)
+        faces = batchPlan.traverse(mesh)
+    else:
+        mesh = loadMesh(sys.argv[1])
+        meshName = mesh.name
+        faces = traverse(mesh)
+    thickness = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+    params = partGen.partParams(thickness, digitsNeeded(mesh.edgeCount()))
+    bundle = None
+    if isArchivePath(sys.argv[2]):
+        bundle = partArchive(sys.argv[2])
+    elif not os.path.isdir(sys.argv[2]):
+        os.makedirs(sys.argv[2])
+
+    # Parts too small for their hinges and bits are faults too
+    def builder(part):
+        try:
+            return partGen.partBytes(part.sides[0], part.sides[1], part.sides[2], params)
+        except ValueError as e:
+            part.fault = str(e)
+            return None
+
+    parts = validate(plan(faces, meshName), params.minAltitude)
+    parts = buffered(build(parts, builder))
+    count = 0
+    faults = 0
+    if bundle:
+        parts = archive(parts, bundle)
+    else:
+        parts = write(parts, sys.argv[2])
+    for part in parts:
+        count += 1
+        faults += part.fault is not None
+    if bundle:
+        bundle.close()
+    print("Wrote %i parts (%i with faults) in %.2f s" % (count, faults, time.perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+""" Computes where every part sits on the assembled mesh.
+
+    A part's placement frame on the mesh:
+        origin - the corner shared by the part's side one and side two
+        x      - unit vector along side one, away from the origin
+        z      - unit face normal, out of the mesh
+        y      - z cross x
+    Side one is picked with the same rule as meshCore.sortSides, applied to
+    the same edgeTable lengths, so the frames follow the face's corner order
+    and never have to match sides by length. The frames of the whole mesh are
+    computed in one pass, with NumPy when it's available. Positions are in
+    the topology's units (cm) except in the assembly manifest, which is mm.
+
+    Parts are modeled in their own frame, the template's. partFrame gives the
+    placement frame in part coordinates, the same for the CAD and the
+    synthesized parts: a part is placed by aligning partFrame with its face's
+    frame. """
+
+import json
+import os
+
+import batchPlan
+from meshCore import vSub, vCross, vLength
+
+np = batchPlan.np
+
+""" Return the position (0, 1 or 2) of side one in a face with the given side
+    lengths, the longest side keeping cyclic order as in meshCore.sortSides. """
+def sideRotation(l0, l1, l2):
+    if l1 > l0 and l1 > l2:
+        return 1
+    elif l2 > l0 and l2 > l1:
+        return 2
+    return 0
+
+def unit(v):
+    length = vLength(v)
+    if length == 0:
+        return (0.0, 0.0, 0.0)
+    return (v[0] / length, v[1] / length, v[2] / length)
+
+""" The placement frames of every face of a meshTopology. origins, xAxes,
+    yAxes and zAxes are (F, 3) arrays with NumPy, lists of tuples without. """
+class transformTable:
+
+    def __init__(self, topology):
+        self.topology = topology
+        lengths = topology.edgeTable().lengths
+        if batchPlan.available:
+            self.vectorized(topology, lengths)
+        else:
+            self.scalar(topology, lengths)
+
+    def vectorized(self, topology, lengths):
+        vertices = np.asarray(topology.vertices, dtype=np.float64)
+        faces = np.asarray(topology.faces, dtype=np.int64).reshape(-1, 3)
+        sides = np.asarray(lengths, dtype=np.float64)[np.asarray(topology.faceEdges, dtype=np.int64).reshape(-1, 3)]
+        l0, l1, l2 = sides[:, 0], sides[:, 1], sides[:, 2]
+        rotation = np.where((l1 > l0) & (l1 > l2), 1, np.where((l2 > l0) & (l2 > l1), 2, 0))
+        rows = np.arange(len(faces))
+        # Side one runs from corner r to corner r + 1, side two starts at r + 1
+        start = vertices[faces[rows, rotation]]
+        origin = vertices[faces[rows, (rotation + 1) % 3]]
+        a, b, c = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = normalized(start - origin)
+            z = normalized(np.cross(b - a, c - a))
+            y = normalized(np.cross(z, x))
+        self.rotation = rotation
+        self.origins, self.xAxes, self.yAxes, self.zAxes = origin, x, y, z
+
+    def scalar(self, topology, lengths):
+        self.rotation = []
+        self.origins, self.xAxes, self.yAxes, self.zAxes = [], [], [], []
+        for f, face in enumerate(topology.faces):
+            r = sideRotation(*(lengths[e] for e in topology.faceEdges[f]))
+            start = topology.vertices[face[r]]
+            origin = topology.vertices[face[(r + 1) % 3]]
+            x = unit(vSub(start, origin))
+            z = unit(topology.faceNormal(f))
+            self.rotation.append(r)
+            self.origins.append(tuple(origin))
+            self.xAxes.append(x)
+            self.yAxes.append(unit(vCross(z, x)))
+            self.zAxes.append(z)
+
+    def __len__(self):
+        return len(self.origins)
+
+    """ Return the (origin, x, y, z) tuples of face f. """
+    def frame(self, f):
+        return tuple(tuple(float(c) for c in v)
+                     for v in (self.origins[f], self.xAxes[f], self.yAxes[f], self.zAxes[f]))
+
+    """ Return the assembly manifest entry of face f, the origin in mm. """
+    def entry(self, f, name):
+        origin, x, y, z = self.frame(f)
+        return {
+            "face": f,
+            "file": name,
+            "origin": [round(c * 10, 4) for c in origin],
+            "x": [round(c, 6) for c in x],
+            "y": [round(c, 6) for c in y],
+            "z": [round(c, 6) for c in z],
+        }
+
+""" Return the rows of a NumPy array scaled to unit length. """
+def normalized(vectors):
+    lengths = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    return np.nan_to_num(vectors / lengths[:, None])
+
+""" Return the placement frame in the coordinates of a part file, in mm, for
+    parts thickness mm thick: the origin halfway through the part at the
+    corner of sides one and two, side one along +X and the outside of the
+    mesh towards -Z. """
+def partFrame(thickness):
+    return {
+        "origin": [0.0, 0.0, round(thickness / 2.0, 4)],
+        "x": [1.0, 0.0, 0.0],
+        "y": [0.0, -1.0, 0.0],
+        "z": [0.0, 0.0, -1.0],
+    }
+
+""" Return the path of the assembly manifest for a mesh exported into saveDir. """
+def assemblyPath(saveDir, meshName):
+    return os.path.join(saveDir, meshName + "_assembly.json")
+
+""" Write the assembly manifest: the placement frame of every part given a
+    list of (face index, file name) and the parts' thickness in mm. """
+def writeAssembly(path, table, parts, thickness):
+    manifest = {
+        "mesh": table.topology.name,
+        "units": "mm",
+        "frame": "origin at the corner of sides one and two, x along side one, z out of the mesh",
+        "partFrame": partFrame(thickness),
+        "parts": [table.entry(f, name) for f, name in parts],
+    }
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=1)
@@ -0,0 +1,103 @@
+""" Validates a whole mesh up front before anything is exported.
+
+    preflightCheck runs every check makeMesh would otherwise only hit face by
+    face during export:
+        shortSide        - faces with a side under meshCore.minSide
+        shortAltitude    - faces whose smallest altitude is under minAltitude
+        nonTriangular    - faces the topology adapter had to skip
+        nonManifoldEdges - edges shared by more than two faces
+        binaryDigits     - whether binaryDigits can number every edge
+    Uses batchPlan when NumPy is available and meshCore otherwise. Face
+    numbers refer to topology.faces. """
+
+import json
+
+import batchPlan
+from meshCore import digitsNeeded, triangleFault
+
+""" Return the faces with a short side and with a short altitude. """
+def faultFaces(topology, minAlt):
+    if batchPlan.available:
+        plan = batchPlan.planTopology(topology, minAlt)
+        return plan.shortSide.nonzero()[0].tolist(), plan.shortAltitude.nonzero()[0].tolist()
+    shortSide, shortAltitude = [], []
+    for f in range(topology.faceCount()):
+        s1, s2, s3 = sorted((topology.edgeLength(e) for e in topology.faceEdges[f]), reverse=True)
+        fault = triangleFault(s1, s2, s3, minAlt)
+        if fault == "shortSide":
+            shortSide.append(f)
+        elif fault == "shortAltitude":
+            shortAltitude.append(f)
+    return shortSide, shortAltitude
+
+class preflightCheck:
+
+    def __init__(self, topology, minAlt, digits):
+        self.topology = topology
+        self.shortSide, self.shortAltitude = faultFaces(topology, minAlt)
+        self.nonTriangular = len(topology.badFaces)
+        self.nonManifoldEdges = topology.nonManifoldEdges()
+        self.digitsNeeded = digitsNeeded(topology.edgeCount())
+        self.digits = digits
+        self.minAlt = minAlt
+
+    """ Return True if nothing stops the mesh from being exported. Short sides
+        and altitudes only get colored, the rest can't be exported at all. """
+    def exportable(self):
+        return not self.nonTriangular and not self.nonManifoldEdges and self.digitsNeeded <= self.digits
+
+    """ Return True if every check passed. """
+    def ok(self):
+        return self.exportable() and not self.shortSide and not self.shortAltitude
+
+    """ Return one line per failed check. """
+    def problems(self):
+        lines = []
+        if self.nonTriangular:
+            lines.append("%i faces aren't triangles" % self.nonTriangular)
+        if self.nonManifoldEdges:
+            lines.append("%i edges are shared by more than two faces" % len(self.nonManifoldEdges))
+        if self.digitsNeeded > self.digits:
+            lines.append("Not enough binary digits, need at least %i digits to represent %i unique edges" % (
+                self.digitsNeeded, self.topology.edgeCount()))
+        if self.shortSide:
+            lines.append("%i faces have a side under 20 mm" % len(self.shortSide))
+        if self.shortAltitude:
+            lines.append("%i faces have an altitude under %.3f mm" % (len(self.shortAltitude), self.minAlt))
+        return lines
+
+    def report(self):
+        return {
+            "mesh": self.topology.name,
+            "faces": self.topology.faceCount(),
+            "edges": self.topology.edgeCount(),
+            "ok": self.ok(),
+            "exportable": self.exportable(),
+            "minAltitude": self.minAlt,
+            "binaryDigits": {"needed": self.digitsNeeded, "available": self.digits},
+            "nonTriangular": self.nonTriangular,
+            "nonManifoldEdges": [list(self.topology.edges[e]) for e in self.nonManifoldEdges],
+            "shortSide": self.shortSide,
+            "shortAltitude": self.shortAltitude,
+        }
+
+    def writeJson(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+def main():
+    import sys
+    from meshIO import loadMesh
+    if len(sys.argv) < 2:
+        print("usage: python preflight.py mesh.obj|mesh.stl [minAltitude mm] [binaryDigits] [report.json]")
+        return
+    topology = loadMesh(sys.argv[1])
+    minAlt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    digits = int(sys.argv[3]) if len(sys.argv) > 3 else digitsNeeded(topology.edgeCount())
+    check = preflightCheck(topology, minAlt, digits)
+    if len(sys.argv) > 4:
+        check.writeJson(sys.argv[4])
+    print("\n".join(check.problems()) or "No problems found")
+
+if __name__ == "__main__":
+    main()
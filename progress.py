@@ -0,0 +1,118 @@
+""" Non blocking progress and failure reporting for long exports.
+
+    A progressReporter counts finished faces, derives throughput and ETA and
+    collects failures so they can be shown once when the run ends instead of
+    stopping the batch on a dialog. fail is for a face that couldn't be made
+    and counts as processed, problem for anything else that went wrong (a
+    cancel, a write error on a face already counted) and doesn't. What the user sees is up to its sink:
+    logSink prints (headless runs), the add-in supplies one backed by Fusion's
+    progress dialog. A sink provides update(reporter), note(message),
+    close(reporter) and a wasCancelled attribute. """
+
+import sys
+import time
+
+""" Return seconds formatted as H:MM:SS. """
+def formatSeconds(seconds):
+    seconds = int(seconds)
+    return "%i:%02i:%02i" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+""" Writes progress lines to a stream, at most once every interval seconds. """
+class logSink:
+
+    wasCancelled = False
+
+    def __init__(self, stream=None, interval=2.0):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.last = 0.0
+
+    def update(self, reporter):
+        now = time.perf_counter()
+        if now - self.last >= self.interval or reporter.processed() == reporter.total:
+            self.last = now
+            self.note(reporter.status())
+
+    def note(self, message):
+        self.stream.write(message + "\n")
+        self.stream.flush()
+
+    def close(self, reporter):
+        self.note(reporter.summary())
+
+class progressReporter:
+
+    def __init__(self, total, sink=None):
+        self.total = total
+        self.sink = sink if sink is not None else logSink()
+        self.done = 0
+        self.failures = []
+        self.problems = []
+        self.start = time.perf_counter()
+
+    def processed(self):
+        return self.done + len(self.failures)
+
+    """ Record a finished face. """
+    def step(self, count=1):
+        self.done += count
+        self.sink.update(self)
+
+    """ Record a failed face, the run carries on. """
+    def fail(self, message):
+        self.failures.append(message)
+        self.sink.update(self)
+
+    """ Record a problem that isn't a face of its own, the run carries on. """
+    def problem(self, message):
+        self.problems.append(message)
+        self.sink.note(message)
+
+    """ Pass an informational message to the sink. """
+    def note(self, message):
+        self.sink.note(message)
+
+    def cancelled(self):
+        return self.sink.wasCancelled
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    """ Return the faces processed per second. """
+    def rate(self):
+        elapsed = self.elapsed()
+        if elapsed <= 0:
+            return 0.0
+        return self.processed() / elapsed
+
+    """ Return the estimated seconds left, or None before the first face. """
+    def eta(self):
+        rate = self.rate()
+        if rate <= 0:
+            return None
+        return max(self.total - self.processed(), 0) / rate
+
+    def status(self):
+        eta = self.eta()
+        return "%i/%i faces, %.2f faces/s, ETA %s, %i failed" % (
+            self.processed(), self.total, self.rate(),
+            formatSeconds(eta) if eta is not None else "-", len(self.failures))
+
+    """ Return the end of run summary, listing up to maxFailures failures. """
+    def summary(self, maxFailures=20):
+        lines = ["%i of %i faces done in %s (%.2f faces/s)" % (
+            self.done, self.total, formatSeconds(self.elapsed()), self.rate())]
+        if self.failures:
+            lines.append("%i faces failed:" % len(self.failures))
+            lines.extend(self.failures[:maxFailures])
+            if len(self.failures) > maxFailures:
+                lines.append("... and %i more" % (len(self.failures) - maxFailures))
+        if self.problems:
+            lines.append("%i problems:" % len(self.problems))
+            lines.extend(self.problems[:maxFailures])
+            if len(self.problems) > maxFailures:
+                lines.append("... and %i more" % (len(self.problems) - maxFailures))
+        return "\n".join(lines)
+
+    def close(self):
+        self.sink.close(self)
@@ -0,0 +1,89 @@
+""" Per stage timing of the export hot path.
+
+    Wrap each stage of the per face work in timer.stage("name") and the
+    timer collects how long every call took. A disabled timer hands back one
+    shared do nothing context so leaving the calls in costs next to nothing.
+    stats() gives count, total, p50, p95 and max per stage, writeJson and
+    writeCsv save them next to the exported parts. """
+
+import csv
+import json
+import time
+
+class nullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+nullStage = nullContext()
+
+class timedStage:
+    def __init__(self, durations):
+        self.durations = durations
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.durations.append(time.perf_counter() - self.start)
+        return False
+
+""" Return the pth percentile (0-100) of sorted values, nearest rank. """
+def percentile(values, p):
+    if not values:
+        return 0.0
+    rank = int(round(p / 100.0 * (len(values) - 1)))
+    return values[rank]
+
+class stageTimer:
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.durations = {}
+
+    """ Return a context manager timing one call of the named stage. """
+    def stage(self, name):
+        if not self.enabled:
+            return nullStage
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations[name] = []
+        return timedStage(durations)
+
+    """ Return {stage: {count, total, p50, p95, max}} in seconds, stages in the
+        order they were first timed. """
+    def stats(self):
+        rv = {}
+        for name, durations in self.durations.items():
+            ordered = sorted(durations)
+            rv[name] = {
+                "count": len(ordered),
+                "total": sum(ordered),
+                "p50": percentile(ordered, 50),
+                "p95": percentile(ordered, 95),
+                "max": ordered[-1] if ordered else 0.0,
+            }
+        return rv
+
+    def writeJson(self, path):
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=1)
+
+    def writeCsv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "count", "total", "p50", "p95", "max"])
+            for name, stat in self.stats().items():
+                writer.writerow([name, stat["count"], "%.6f" % stat["total"], "%.6f" % stat["p50"],
+                                 "%.6f" % stat["p95"], "%.6f" % stat["max"]])
+
+    """ Return a short text table of the stats for message boxes and logs. """
+    def report(self):
+        lines = []
+        for name, stat in self.stats().items():
+            lines.append("%s: %i calls, %.2f s total, p50 %.3f s, p95 %.3f s, max %.3f s" % (
+                name, stat["count"], stat["total"], stat["p50"], stat["p95"], stat["max"]))
+        return "\n".join(lines)
@@ -0,0 +1,55 @@
+""" Writes binary STL files straight from triangle lists.
+
+    Triangles are given as three (x, y, z) corners wound counter clockwise
+    when seen from outside the solid. Facet normals are derived from the
+    winding. Units are whatever the caller uses, Mesh Maker writes mm. """
+
+import struct
+
+from meshCore import vCross, vSub, vLength
+
+facetStruct = struct.Struct("<12fH")
+countStruct = struct.Struct("<I")
+headerSize = 80
+
+""" Return the 80 byte header of a binary STL. """
+def stlHeader(text="Mesh Maker"):
+    return text.encode("ascii", "replace")[:headerSize].ljust(headerSize, b" ")
+
+""" Return the binary record of a single facet. """
+def facetBytes(a, b, c):
+    n = vCross(vSub(b, a), vSub(c, a))
+    length = vLength(n)
+    if length > 0:
+        n = (n[0] / length, n[1] / length, n[2] / length)
+    return facetStruct.pack(n[0], n[1], n[2],
+                            a[0], a[1], a[2], b[0], b[1], b[2], c[0], c[1], c[2], 0)
+
+""" Stream the triangles into the open binary file f one facet at a time.
+    The facet count comes first so triangles must be a sequence. """
+def writeStlTo(f, triangles, header="Mesh Maker"):
+    f.write(stlHeader(header))
+    f.write(countStruct.pack(len(triangles)))
+    for tri in triangles:
+        f.write(facetBytes(*tri))
+    return headerSize + countStruct.size + facetStruct.size * len(triangles)
+
+""" File wrapper updating a hashlib object with what is written through it. """
+class hashingWriter:
+    def __init__(self, f, sha):
+        self.f = f
+        self.sha = sha
+
+    def write(self, data):
+        self.sha.update(data)
+        return self.f.write(data)
+
+""" Return the complete binary STL for the given triangles. """
+def stlBytes(triangles, header="Mesh Maker"):
+    records = [facetBytes(*tri) for tri in triangles]
+    return stlHeader(header) + countStruct.pack(len(records)) + b"".join(records)
+
+""" Write the triangles to a binary STL file at path. """
+def writeStl(path, triangles, header="Mesh Maker"):
+    with open(path, "wb") as f:
+        return writeStlTo(f, triangles, header)